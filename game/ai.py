@@ -4,8 +4,11 @@
 # First version of AI has been developed using TDD.
 
 
+import heapq
+
 from . import constants
-from .pathfinding import Pathfinder
+from .pathfinding import flood_fill, Pathfinder
+from .turn_context import TurnContext
 
 
 class BaseAI:
@@ -21,13 +24,25 @@ class BaseAI:
         Enemy Being, owner of this AI instance.
     info: list of [int, Being | MapObject]
         In 'info' AI stores all MapObject and Being instances and calculated priorities.
+    map_in_range, map_out_range: list of Decision
+        Options with targets that owner can attack this turn, and all the other options.
 
     Methods:
     --------
-    gather_map_info (Grid, Beings)
+    gather_map_info (Grid, Beings, TurnContext)
         This method populates info attribute. It iterates over Beings and MapObjects, finds the shortest valid path
         to every Being and MapObject, filters out targets that are outside the owner range, then calculates
-        priority.
+        priority using InfluenceMap. Uses the TurnContext shared by all enemies, if passed.
+    can_stay (Beings): bool
+        Checks if owner may end its move on its current cell.
+    add_decisions (list of tuples, Grid, InfluenceMap)
+        Adds options computed by plan_moves to map_in_range and map_out_range.
+    commit (Decision)
+        Keeps only the chosen option; used by plan_enemies.
+    best_decisions (int): list of Decision
+        Returns the options with the highest priority.
+    decide (Beings, Grid): Decision
+        Returns the best option.
     """
 
     def __init__(self, owner):
@@ -35,130 +50,325 @@ class BaseAI:
         self.map_in_range = []
         self.map_out_range = []
 
-    def gather_map_info(self, grid, beings):
+    def gather_map_info(self, grid, beings, context=None):
         # Zero self.info.
         self.map_in_range = []
         self.map_out_range = []
-        pathfinder = Pathfinder(grid)
-        pathfinder.set_up_path_grid(beings)
-        for tile in grid.tiles:
-            data = {
-                "tile": (tile.cell_position.x, tile.cell_position.y),
-                "targets": None,
-                "targetables": None,
-                "affected": None,
-                "priorities": None,
-                "path": tuple(),
-                "in range": True,
-            }
-            pathfinder.clean_up_path_grid()
-            # Check availability of every tile.
-            path, _ = pathfinder.find_path(self.owner.cell_position, tile.cell_position)
-            data["path"] = path[1:]
-            if len(path) == 0:
-                continue  # tile occupied by object, or no valid path to tile
-            if len(path) > self.owner.range:
-                data["in range"] = False
-                data["tile"] = path[self.owner.range]
-            b = beings.find_being_by_cell_position(
-                tile.cell_position.x, tile.cell_position.y
+        # Walkable flags and scores of Beings and MapObjects are shared by all enemies during the enemy phase;
+        # without the shared TurnContext, AI builds its own one.
+        own_context = context is None
+        if own_context:
+            context = TurnContext(grid, beings)
+        # Single flood fill from owner; every path is rebuilt from predecessors.
+        _, predecessors = context.distance_field(self.owner)
+        rows = plan_moves(
+            grid.width,
+            grid.height,
+            predecessors,
+            self.owner.range,
+            context.influence.scores,
+            context.influence.targets,
+            self.owner.attack.affected_table(grid.width, grid.height),
+            self.can_stay(beings),
+        )
+        self.add_decisions(rows, grid, context.influence)
+        if own_context:
+            context.close()
+
+    def can_stay(self, beings):
+        """Owner can not end its move on its cell if another Being stands on it, too."""
+        being = beings.find_being_by_cell_position(
+            self.owner.cell_position.x, self.owner.cell_position.y
+        )
+        return being is None or being is self.owner
+
+    def add_decisions(self, rows, grid, influence):
+        """Creates Decision instances from the rows returned by plan_moves."""
+        for cell, tile, path, in_range, priorities, best_index, hits in rows:
+            # Footprint of the attack is precomputed, and already clipped to the map bounds. Every attack effect
+            # has its targetable position (so, "click on it") and tiles that will be affected by attack.
+            footprint = self.owner.attack.footprint_at(
+                cell[0], cell[1], grid.width, grid.height
             )
-            if b and b is not self.owner:
-                continue  # tile occupied by other being
-            targetables = []
-            all_affected_positions = []
-            # Iterating over all attack effects of owner's attack,
-            # in order to find all tiles that owner can target (so, "click on it") (stored in targetables)
-            # and tiles that will be affected by attack.
-            # Index of one element of all_affected_positions match index of element of targetables.
-            for effect in self.owner.attack.effects:
-                targetable_position = (
-                    tile.cell_position.x + effect.target_positions[0][0],
-                    tile.cell_position.y + effect.target_positions[0][1],
-                )
-                # Add only targetable positions that are within map bounds.
-                if (
-                    targetable_position[0] >= 0
-                    and targetable_position[0] < constants.GRID_SIZE_W
-                    and targetable_position[1] >= 0
-                    and targetable_position[1] < constants.GRID_SIZE_H
-                ):
-                    targetables.append(targetable_position)
-                    affected_positions = []
-                    for element in effect.attack_pattern:
-                        affected_position = (
-                            targetable_position[0] + element[0],
-                            targetable_position[1] + element[1],
-                        )
-                        # Add only these tiles that will be affected by attack and are within map bounds.
-                        if (
-                            affected_position[0] >= 0
-                            and affected_position[0] < constants.GRID_SIZE_W
-                            and affected_position[1] >= 0
-                            and affected_position[1] < constants.GRID_SIZE_H
-                        ):
-                            affected_positions.append(affected_position)
-                    all_affected_positions.append(affected_positions)
-            data["targetables"] = targetables
-            data["affected"] = all_affected_positions
-            # Calculate priority penalty for tile.
-            range_priority_penalty = len(path) * constants.AI_RANGE_FALLOFF
-            # Calculating priorities for every targetable tile.
-            priorities = []
-            targets = []
-            for affected_tiles in all_affected_positions:
-                priority = -range_priority_penalty
-                for affected_tile in affected_tiles:
-                    being = beings.find_being_by_cell_position(
-                        affected_tile[0],
-                        affected_tile[1],
-                    )
-                    map_object = grid.map_objects.find_map_object_by_cell_position(
-                        affected_tile[0],
-                        affected_tile[1],
-                    )
-                    if being:
-                        if being in beings.enemy_beings:
-                            priority -= constants.AI_ATTACK_OWN_PRIORITY
-                        else:
-                            targets.append(being)
-                            if being.hp <= 0:
-                                pass
-                            elif (
-                                being.hp == 1
-                            ):  # TODO: Change to comparison with attack power!
-                                priority += constants.AI_KILL_PLAYER_PRIORITY
-                            else:
-                                priority += constants.AI_ATTACK_PLAYER_PRIORITY
-                    if map_object:
-                        if map_object.target:
-                            targets.append(map_object)
-                            priority += constants.AI_BUILDING_PRIORITY
-                priorities.append(priority)
-            data["priorities"] = priorities
-            data["targets"] = targets
-            if data["in range"] and data["targets"]:
-                self.map_in_range.append(data)
+            targets = [target for index in hits for target in influence.targets[index]]
+            decision = Decision(
+                tile, path, in_range, footprint, priorities, targets, best_index
+            )
+            if in_range and targets:
+                self.map_in_range.append(decision)
             else:
-                self.map_out_range.append(data)
+                self.map_out_range.append(decision)
 
-    def _sort_priorities_in_range(self):
-        return sorted(
-            self.map_in_range, key=lambda d: (max(d["priorities"])), reverse=True
-        )
+    def commit(self, decision):
+        """Drops all the other options, so decide returns the decision until map info is gathered again."""
+        self.map_in_range = []
+        self.map_out_range = []
+        if decision.in_range and decision.targets:
+            self.map_in_range.append(decision)
+        else:
+            self.map_out_range.append(decision)
 
-    def _sort_priorities_out_range(self):
-        return sorted(
-            self.map_out_range, key=lambda d: (max(d["priorities"])), reverse=True
-        )
+    def best_decisions(self, n):
+        """
+        Returns up to n Decision instances with the highest priority, in range ones first. Decisions of the same
+        priority keep the order in which they were gathered.
+        """
+        best = heapq.nlargest(n, self.map_in_range, key=_decision_priority)
+        if len(best) < n:
+            best.extend(
+                heapq.nlargest(
+                    n - len(best), self.map_out_range, key=_decision_priority
+                )
+            )
+        return best
 
     def decide(self, beings, grid):
-        in_range_sorted = self._sort_priorities_in_range()
-        # There are targets in range.
-        if len(in_range_sorted) > 0:
-            return in_range_sorted[0]
-        out_range_sorted = self._sort_priorities_out_range()
-        # There are no targets in range, but owner is not blocked and can move towards the targets.
-        if len(out_range_sorted) > 0:
-            return out_range_sorted[0]
+        # Targets in range go first; if there are none, but owner is not blocked, it moves towards the targets.
+        best = self.best_decisions(1)
+        if best:
+            return best[0]
         return "nothing"
+
+
+def _decision_priority(decision):
+    return decision.priority
+
+
+def plan_moves(
+    width, height, predecessors, owner_range, scores, targets, affected, stay=True
+):
+    """
+    Scores every tile that the Being may reach, using only plain data, so it may run in the worker process.
+    predecessors is the distance field of the Being, scores and targets are InfluenceMap layers (only truthiness
+    of targets matters), and affected is Attack.affected_table for the map. If stay is False, the Being can not
+    end its move on its own cell, because another Being stands on the same cell.
+    Returns list of (cell, tile, path, in_range, priorities, best_index, hits) rows, in the order of Grid.tiles, where
+    hits are indices of the affected cells with targets. See Decision for the meaning of the other fields.
+    """
+    rows = []
+    for index in range(width * height):
+        cell = (index % width, index // width)
+        # Check availability of every tile. Cells of other Beings are not walkable, so they are never reached.
+        path = Pathfinder.reconstruct_path(predecessors, cell)
+        if len(path) == 0:
+            continue  # tile occupied by object, or no valid path to tile
+        if len(path) == 1 and not stay:
+            continue  # tile occupied by other being
+        in_range = len(path) <= owner_range
+        # Calculate priority penalty for tile.
+        range_priority_penalty = len(path) * constants.AI_RANGE_FALLOFF
+        # Calculating priorities for every targetable tile; the first effect with the highest priority wins.
+        priorities = []
+        hits = []
+        best_index = 0
+        for affected_tiles in affected[index]:
+            priority = -range_priority_penalty
+            for x, y in affected_tiles:
+                affected_index = y * width + x
+                priority += scores[affected_index]
+                if targets[affected_index]:
+                    hits.append(affected_index)
+            if not priorities or priority > priorities[best_index]:
+                best_index = len(priorities)
+            priorities.append(priority)
+        rows.append(
+            (
+                cell,
+                cell if in_range else path[owner_range],
+                path[1:],
+                in_range,
+                priorities,
+                best_index,
+                hits,
+            )
+        )
+    return rows
+
+
+def plan_enemies(enemies, grid, context, executor=None, workers=1):
+    """
+    Gathers map info of all the enemies at once, against the same state of the world, instead of one enemy after
+    another. If the executor (e.g. ProcessPoolExecutor) is passed, enemies are split into one group per worker, and
+    every group is planned by one task; only plain data of TurnContext (walkable flags and InfluenceMap layers) is
+    sent to the workers, once per task.
+    As enemies do not see moves of each other, two of them might choose the same tile. Conflicts are resolved in
+    the order in which Simulation activates the enemies (the last one first): every enemy takes its best option that
+    neither ends on nor passes through the tile already taken by one of the previous enemies.
+    """
+    width, height = grid.width, grid.height
+    walkable = bytes(grid.occupancy.occupied)
+    target_flags = bytes(bool(targets) for targets in context.influence.targets)
+    # Copies of Attack share the tables, so every table is sent once.
+    tables = []
+    table_indices = []
+    for enemy in enemies:
+        table = enemy.attack.affected_table(width, height)
+        for i, known in enumerate(tables):
+            if known is table:
+                table_indices.append(i)
+                break
+        else:
+            table_indices.append(len(tables))
+            tables.append(table)
+    snapshot = (
+        width,
+        height,
+        walkable,
+        tuple(context.influence.scores),
+        target_flags,
+        tuple(tables),
+    )
+    positions = [(enemy.cell_position.x, enemy.cell_position.y) for enemy in enemies]
+    # Conflict resolution below looks only at the limit best options of every enemy.
+    limit = len(enemies) + constants.AI_PLANNING_SPARE_OPTIONS
+    tasks = [
+        (
+            position,
+            enemy.range,
+            table_index,
+            enemy.ai.can_stay(context.beings),
+            limit,
+        )
+        for enemy, position, table_index in zip(enemies, positions, table_indices)
+    ]
+    if executor is None:
+        results = _plan_enemy_group(snapshot, tasks)
+    else:
+        size = -(-len(tasks) // max(workers, 1))
+        groups = [tasks[i : i + size] for i in range(0, len(tasks), size)]
+        results = [
+            rows
+            for group_results in executor.map(
+                _plan_enemy_group, [snapshot] * len(groups), groups
+            )
+            for rows in group_results
+        ]
+    for enemy, rows in zip(enemies, results):
+        enemy.ai.map_in_range = []
+        enemy.ai.map_out_range = []
+        enemy.ai.add_decisions(rows, grid, context.influence)
+    # Every option of the enemy ends on the different tile, so one of the len(enemies) best options always ends on
+    # a free tile. Paths are found against the snapshot, so if every such option passes through the taken tile, the
+    # first one that ends on a free tile is chosen anyway.
+    taken = set()
+    for enemy, position in reversed(list(zip(enemies, positions))):
+        best = enemy.ai.best_decisions(limit)
+        if not best:
+            continue
+        ends = [decision.path[-1] if decision.path else position for decision in best]
+        free = [i for i, end in enumerate(ends) if end not in taken]
+        chosen = next(
+            (i for i in free if taken.isdisjoint(best[i].path)),
+            free[0] if free else 0,
+        )
+        taken.add(ends[chosen])
+        enemy.ai.commit(best[chosen])
+
+
+def _plan_enemy_group(snapshot, tasks):
+    """Runs _plan_enemy for every task of the group. It is run in the worker process by plan_enemies."""
+    return [_plan_enemy(snapshot, *task) for task in tasks]
+
+
+def _plan_enemy(snapshot, position, owner_range, table_index, stay, limit):
+    """
+    Runs plan_moves for one enemy against the snapshot.
+    Returns only the rows of limit best options, chosen the same way as BaseAI.best_decisions chooses them.
+    """
+    width, height, walkable, scores, target_flags, tables = snapshot
+    _, predecessors = flood_fill(width, height, walkable, position)
+    rows = plan_moves(
+        width,
+        height,
+        predecessors,
+        owner_range,
+        scores,
+        target_flags,
+        tables[table_index],
+        stay,
+    )
+    # Rows are split the same way as by BaseAI.add_decisions: in range, with targets (hits) first.
+    in_range = [row for row in rows if row[3] and row[6]]
+    out_range = [row for row in rows if not (row[3] and row[6])]
+    best = heapq.nlargest(limit, in_range, key=_row_priority)
+    if len(best) < limit:
+        best.extend(heapq.nlargest(limit - len(best), out_range, key=_row_priority))
+    return best
+
+
+def _row_priority(row):
+    priorities, best_index = row[4], row[5]
+    return priorities[best_index]
+
+
+class Decision:
+    """
+    Decision is one option considered by AI: a tile the owner may move to, and the attack it may perform from there.
+    Records are created for every reachable tile, so they are kept small: the attack is described by the owner's
+    precomputed footprint, and the best attack effect is found once, when the record is created.
+
+    Parameters:
+    -----------
+    tile: tuple
+        Tile the owner moves to. If the tile is out of the owner range, the farthest tile reachable this turn.
+    path: list of tuples
+        Steps towards the tile, without the owner position. Consumed by Simulation, one step per tick.
+    in_range: bool
+        Can owner reach the tile this turn?
+    footprint: tuple of tuples
+        Attack footprint of the owner standing on the tile, see Attack.footprint_at.
+    priorities: list of int
+        Priority of every attack effect.
+    targets: list of Being | MapObject
+        Player Beings and targetable MapObject instances hit by any attack effect.
+    best_index: int
+        Index of the first attack effect with the highest priority.
+
+    Attributes:
+    -----------
+    priority: int
+        Highest priority of the attack effects.
+    targetables: list of tuples
+        Target position of every attack effect.
+    affected: list of tuples
+        Positions affected by every attack effect.
+    """
+
+    __slots__ = (
+        "tile",
+        "path",
+        "in_range",
+        "footprint",
+        "priorities",
+        "targets",
+        "best_index",
+        "priority",
+    )
+
+    def __init__(
+        self, tile, path, in_range, footprint, priorities, targets, best_index
+    ):
+        self.tile = tile
+        self.path = path
+        self.in_range = in_range
+        self.footprint = footprint
+        self.priorities = priorities
+        self.targets = targets
+        self.best_index = best_index
+        self.priority = priorities[best_index]
+
+    @property
+    def targetables(self):
+        return [target for _, target, _ in self.footprint]
+
+    @property
+    def affected(self):
+        return [affected for _, _, affected in self.footprint]
+
+    @property
+    def best_targetable(self):
+        return self.footprint[self.best_index][1]
+
+    @property
+    def best_affected(self):
+        return self.footprint[self.best_index][2]
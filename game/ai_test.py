@@ -5,14 +5,17 @@
 
 
 import copy
+from concurrent.futures import ProcessPoolExecutor
 
 from . import constants
+from .ai import plan_enemies
 from .attacks import attack_side_punch, attack_wall_punch
 from .being import construct_beings, Enemy, Player
 from .beings import Beings
 from .grid import Grid
 from .map_object import MapObject
 from .map_objects import MapObjects
+from .turn_context import TurnContext
 
 
 class TestAI:
@@ -93,67 +96,114 @@ class TestAI:
     e5.range = 1
     e6 = construct_beings(Enemy, 0, 0)
     beings = Beings()
-    beings.player_beings.append(k)
-    beings.player_beings.append(p)
+    beings.add_player_being(k)
+    beings.add_player_being(p)
 
     def test_ai_1(self):
         self.e1.ai.gather_map_info(self.grid, self.beings)
-        assert self.e1.cell_position.x == 0 and self.e1.cell_position.y == 5
-        data = self.e1.ai.decide()
-        assert self.e1.cell_position.x == 1 and self.e1.cell_position.y == 6
-        assert data["tile"] == (1, 6)
-        assert len(data["targetables"]) == 4
-        assert len(data["affected"]) == 4
-        assert max(data["priorities"]) == 4  # 7 for killing player, -3 for path length
-        assert data["in range"] is True
+        data = self.e1.ai.decide(self.beings, self.grid)
+        assert data.tile == (1, 6)
+        assert len(data.targetables) == 4
+        assert len(data.affected) == 4
+        assert max(data.priorities) == 4  # 7 for killing player, -3 for path length
+        assert data.in_range is True
+        assert self.k in data.targets and self.p not in data.targets
 
     def test_ai_2(self):
         self.e2.ai.gather_map_info(self.grid, self.beings)
-        assert self.e2.cell_position.x == 7 and self.e2.cell_position.y == 5
-        data = self.e2.ai.decide()
-        assert self.e2.cell_position.x == 7 and self.e2.cell_position.y == 6
-        assert data["tile"] == (7, 6)
-        assert len(data["targetables"]) == 3
-        assert len(data["affected"]) == 3
-        assert (
-            max(data["priorities"]) == 3
-        )  # 5 for attacking player, -2 for path length
-        assert data["in range"] is True
+        data = self.e2.ai.decide(self.beings, self.grid)
+        assert data.tile == (7, 6)
+        assert len(data.targetables) == 3
+        assert len(data.affected) == 3
+        assert max(data.priorities) == 3  # 5 for attacking player, -2 for path length
+        assert data.in_range is True
+        assert data.targets == [self.p]
 
     def test_ai_3(self):
         self.e3.ai.gather_map_info(self.grid, self.beings)
-        assert self.e3.cell_position.x == 3 and self.e3.cell_position.y == 6
-        data = self.e3.ai.decide()
-        assert self.e3.cell_position.x == 1 and self.e3.cell_position.y == 6
-        assert data["tile"] == (1, 6)
-        assert len(data["targetables"]) == 4
-        assert len(data["affected"]) == 4
-        assert max(data["priorities"]) == 4  # 7 for killing player, -3 for path length
-        assert data["in range"] is True
+        data = self.e3.ai.decide(self.beings, self.grid)
+        assert data.tile == (1, 6)
+        assert len(data.targetables) == 4
+        assert len(data.affected) == 4
+        assert max(data.priorities) == 4  # 7 for killing player, -3 for path length
+        assert data.in_range is True
+        assert self.k in data.targets and self.p not in data.targets
 
     def test_ai_4(self):
         self.e4.ai.gather_map_info(self.grid, self.beings)
-        assert self.e4.cell_position.x == 5 and self.e4.cell_position.y == 0
-        data = self.e4.ai.decide()
-        assert self.e4.cell_position.x == 4 and self.e4.cell_position.y == 0
-        assert data["tile"] == (4, 0)
-        assert len(data["targetables"]) == 3
-        assert len(data["affected"]) == 3
+        data = self.e4.ai.decide(self.beings, self.grid)
+        assert data.tile == (4, 0)
+        assert len(data.targetables) == 3
+        assert len(data.affected) == 3
         assert (
-            max(data["priorities"]) == 6
+            max(data.priorities) == 6
         )  # 8 for destroying building, -2 for path length
-        assert data["in range"] is True
+        assert data.in_range is True
+        assert data.targets == [self.building]
 
     def test_ai_5(self):
         self.e5.ai.gather_map_info(self.grid, self.beings)
-        assert self.e5.cell_position.x == 3 and self.e5.cell_position.y == 3
-        data = self.e5.ai.decide()
-        assert self.e5.cell_position.x == 3 and self.e5.cell_position.y == 2
-        assert data["tile"] == (3, 2)
-        assert data["in range"] is False
+        data = self.e5.ai.decide(self.beings, self.grid)
+        assert data.tile == (3, 2)
+        assert data.in_range is False
 
     def test_ai_6(self):
         self.e6.ai.gather_map_info(self.grid, self.beings)
-        data = self.e6.ai.decide()
-        assert data["tile"] == (0, 0)
-        assert len(data["targets"]) == 0
+        data = self.e6.ai.decide(self.beings, self.grid)
+        assert data.tile == (0, 0)
+        assert len(data.targets) == 0
+
+
+def test_ai_best_decisions():
+    grid = Grid(width=8, height=8, map_objects=MapObjects())
+    player = construct_beings(Player, 7, 7)
+    enemy = construct_beings(Enemy, 0, 0)
+    beings = Beings([player], [enemy])
+    enemy.ai.gather_map_info(grid, beings)
+    best = enemy.ai.best_decisions(len(enemy.ai.map_out_range) + 1)
+    assert len(best) == len(enemy.ai.map_in_range) + len(enemy.ai.map_out_range)
+    assert best[0] is enemy.ai.decide(beings, grid)
+    for decision in best:
+        assert decision.priority == max(decision.priorities)
+        assert decision.best_index == decision.priorities.index(decision.priority)
+        assert decision.best_targetable == decision.targetables[decision.best_index]
+    in_range = len(enemy.ai.map_in_range)
+    for decisions in (best[:in_range], best[in_range:]):
+        priorities = [decision.priority for decision in decisions]
+        assert priorities == sorted(priorities, reverse=True)
+
+
+def _planned_moves(
+    workers, size=8, player_cell=(0, 0), enemy_cells=((1, 2), (2, 1), (7, 7))
+):
+    grid = Grid(width=size, height=size, map_objects=MapObjects())
+    player = construct_beings(Player, *player_cell)
+    enemies = [construct_beings(Enemy, x, y) for x, y in enemy_cells]
+    beings = Beings([player], enemies)
+    context = TurnContext(grid, beings)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            plan_enemies(enemies, grid, context, executor, workers)
+    else:
+        plan_enemies(enemies, grid, context)
+    context.close()
+    planned = []
+    for enemy in enemies:
+        decision = enemy.ai.decide(beings, grid)
+        end = (enemy.cell_position.x, enemy.cell_position.y)
+        if decision.path:
+            end = decision.path[-1]
+        planned.append((decision.tile, end, decision.priority, list(decision.path)))
+    return planned
+
+
+def test_ai_plan_enemies():
+    planned = _planned_moves(1)
+    assert _planned_moves(2) == planned
+    # Enemy at (1, 0) moves first, to (1, 1). The best option of the enemy at (2, 1) walks through (1, 1) to (0, 1),
+    # so it has to take another one.
+    layout = dict(size=5, player_cell=(0, 2), enemy_cells=((2, 1), (1, 0)))
+    planned = _planned_moves(1, **layout)
+    assert planned[1][1] == (1, 1)
+    assert (1, 1) not in planned[0][3]
+    assert _planned_moves(2, **layout) == planned
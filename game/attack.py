@@ -14,55 +14,131 @@ class Attack:
     If cursor argument is True (as is default, and remains True for player targeting), then x, y arguments
     are transformed from px to cells. Otherwise (e.g. after ai decides to attack) perform method assumes that cell-based
     coords has been passed.
+
+    Attributes:
+    -----------
+    effects: tuple of AttackEffect
+        AttackEffect instances that make the Attack.
+    footprint: tuple of tuples
+        Immutable table computed once, on creation: (effect, target offset, affected offsets) for every target
+        position of every effect. Offsets of target are relative to the attacker, offsets of affected cells are
+        relative to the target. Copies of Attack (every Being copies its Attack) share the table.
+
+    Methods:
+    --------
+    footprint_at (int, int, int, int): tuple of tuples
+        Returns footprint of attacker standing at the cell, in absolute cell coords, clipped to the map bounds.
+    affected_table (int, int): list of tuples
+        Returns cells affected by every effect, for attacker standing on every cell of the map.
+    perform (Beings, MapObjects, int, int, bool): tuple of tuples
+        Performs every effect that may target the cell. Returns the cells affected by the performed effects.
+    return_attackable_positions (bool, int, int): list of tuples
+        Returns all cells that may be affected by the Attack.
     """
 
     def __init__(self, *args):
         self.effects = args
         self.owner = None
+        self.footprint = tuple(
+            (
+                effect,
+                tuple(target),
+                tuple(tuple(cell) for cell in effect.attack_pattern),
+            )
+            for effect in self.effects
+            for target in effect.target_positions
+        )
+        # Clipped footprints for every cell, built on the first use for the map size; see footprint_at.
+        self._footprints = {}
+        self._affected_tables = {}
+
+    def footprint_at(self, x, y, width, height):
+        """
+        Returns tuple of (effect, target cell, affected cells) for attacker standing at (x, y) on map of width x height
+        cells. Targets outside of the map are left out, and so are the affected cells. Tables for the whole map are
+        computed once per map size, and shared by AI, SpriteTracker and perform method.
+        """
+        table = self._footprints.get((width, height))
+        if table is None:
+            table = [
+                self._clip_footprint(cell % width, cell // width, width, height)
+                for cell in range(width * height)
+            ]
+            self._footprints[(width, height)] = table
+        return table[y * width + x]
+
+    def affected_table(self, width, height):
+        """
+        Returns list indexed by y * width + x, with tuple of affected cells of every effect for attacker standing
+        at (x, y) - the part of footprint_at needed by AI. It contains only cell coords, so unlike footprint_at it can
+        be sent to the worker process, see ai.plan_enemies.
+        """
+        table = self._affected_tables.get((width, height))
+        if table is None:
+            table = [
+                tuple(
+                    affected
+                    for _, _, affected in self.footprint_at(
+                        cell % width, cell // width, width, height
+                    )
+                )
+                for cell in range(width * height)
+            ]
+            self._affected_tables[(width, height)] = table
+        return table
+
+    def _clip_footprint(self, x, y, width, height):
+        rows = []
+        for effect, target, affected in self.footprint:
+            tx = x + target[0]
+            ty = y + target[1]
+            if not (0 <= tx < width and 0 <= ty < height):
+                continue
+            cells = tuple(
+                (tx + cell[0], ty + cell[1])
+                for cell in affected
+                if 0 <= tx + cell[0] < width and 0 <= ty + cell[1] < height
+            )
+            rows.append((effect, (tx, ty), cells))
+        return tuple(rows)
 
     def perform(self, beings, map_objects, x, y, cursor=True):
         if self.owner.attacked:
-            return
-        performed = False
-        for effect in self.effects:
+            return ()
+        if cursor:
             cursor_position = Position(x, y).return_px_to_cell()
-            if not cursor:
-                cursor_position = Position(x, y)
-            valid_target_positions = []
-            for target in effect.target_positions:
-                valid_target_position = (
-                    self.owner.cell_position.x + target[0],
-                    self.owner.cell_position.y + target[1],
-                )
-                valid_target_positions.append(valid_target_position)
-            if (cursor_position.x, cursor_position.y) in valid_target_positions:
-                effect.perform(
-                    beings, map_objects, cursor_position.x, cursor_position.y
-                )
-                performed = True
+            x = cursor_position.x
+            y = cursor_position.y
+        performed = []
+        for effect, target, affected in self.footprint_at(
+            self.owner.cell_position.x,
+            self.owner.cell_position.y,
+            map_objects.width,
+            map_objects.height,
+        ):
+            if target == (x, y):
+                effect.perform(beings, map_objects, x, y)
+                performed.extend(affected)
         if performed:
             self.owner.attacked = True
             self.owner.moved = True
+        return tuple(performed)
 
     def return_attackable_positions(
         self, owner_position_agnostic=False, x=None, y=None
     ):
-        # TODO: I think it could be used in SpriteTracker, too!
         positions = []
-        for effect in self.effects:
-            for target in effect.target_positions:
-                for pattern in effect.attack_pattern:
-                    pos_x = self.owner.cell_position.x
-                    pos_y = self.owner.cell_position.y
-                    if owner_position_agnostic:
-                        pos_x = 0
-                        pos_y = 0
-                    if x and y:
-                        pos_x = x
-                        pos_y = y
-                    target_position = (
-                        pos_x + target[0] + pattern[0],
-                        pos_y + target[1] + pattern[1],
-                    )
-                    positions.append(target_position)
+        pos_x = self.owner.cell_position.x
+        pos_y = self.owner.cell_position.y
+        if owner_position_agnostic:
+            pos_x = 0
+            pos_y = 0
+        if x is not None and y is not None:
+            pos_x = x
+            pos_y = y
+        for _, target, affected in self.footprint:
+            for pattern in affected:
+                positions.append(
+                    (pos_x + target[0] + pattern[0], pos_y + target[1] + pattern[1])
+                )
         return positions
@@ -132,3 +132,28 @@ def test_attack_patterns_bound_to_being():
                 )
             )
     assert all(x in [(2, 4), (2, 2)] for x in pattern_3)
+
+
+def test_footprint_bound_to_being():
+    footprint = player_2.attack.footprint_at(3, 3, 8, 8)
+    assert [target for _, target, _ in footprint] == [(3, 4), (3, 2), (2, 3), (4, 3)]
+    assert footprint[0][0] is attack_2.effects[0]
+    assert footprint[0][2] == ((2, 4), (3, 4), (4, 4))
+    assert player_2.attack.footprint_at(3, 3, 8, 8) is footprint
+
+
+def test_footprint_clipped_to_map_bounds():
+    footprint = attack_2.footprint_at(0, 0, 8, 8)
+    assert [target for _, target, _ in footprint] == [(0, 1), (1, 0)]
+    assert footprint[0][2] == ((0, 1), (1, 1))
+    assert footprint[1][2] == ((1, 1),)
+    corner = attack_2.footprint_at(2, 1, 3, 2)
+    assert [target for _, target, _ in corner] == [(2, 0), (1, 1)]
+
+
+def test_attackable_positions_at_zero_coords():
+    attack = construct_beings(Player, 5, 5).attack
+    origin = attack.return_attackable_positions(owner_position_agnostic=True)
+    positions = attack.return_attackable_positions(x=0, y=3)
+    assert positions == [(px, py + 3) for px, py in origin]
+    assert attack.return_attackable_positions(x=0, y=0) == origin
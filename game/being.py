@@ -20,6 +20,8 @@ class Being:
     """
 
     def __init__(self):
+        # Beings instance that aggregates this Being; set by Beings when the Being is added.
+        self.owner = None
         self.build_active()
         self.build_moved()
         self.build_attacked()
@@ -121,6 +123,7 @@ class Player(Being):
         self.ai = None
 
     def move_to(self, x, y):
+        old_position = self.cell_position
         self.cell_position = Position(x, y)
         self.px_position = Position(
             (x * constants.TILE_SIZE_W) + constants.TILE_CENTER_OFFSET_X,
@@ -130,6 +133,8 @@ class Player(Being):
         self.sprite_active.update_position(self.px_position)
         self.sprite_selected.update_position(self.px_position)
         self.sprite_targeted.update_position(self.px_position)
+        if self.owner is not None:
+            self.owner.update_being_position(self, old_position)
 
 
 # Concrete
@@ -173,6 +178,7 @@ class Enemy(Being):
         self.ai = BaseAI(self)
 
     def move_to(self, x, y):
+        old_position = self.cell_position
         self.cell_position = Position(x, y)
         self.px_position = Position(
             (x * constants.TILE_SIZE_W) + constants.TILE_CENTER_OFFSET_X,
@@ -181,6 +187,8 @@ class Enemy(Being):
         self.sprite.update_position(self.px_position)
         self.sprite_selected.update_position(self.px_position)
         self.sprite_targeted.update_position(self.px_position)
+        if self.owner is not None:
+            self.owner.update_being_position(self, old_position)
         self.moved = True
 
 
@@ -3,6 +3,7 @@
 
 from .ai import BaseAI
 from game import being
+from game.beings import Beings
 
 
 class TestBeing:
@@ -78,3 +79,33 @@ def test_being_move_to():
         == being_player.sprite_selected.position.y
         == being_player.sprite_targeted.position.y
     )
+
+
+def test_being_move_to_updates_beings():
+    being_player = being.construct_beings(being.Player, 2, 3)
+    being_enemy = being.construct_beings(being.Enemy, 4, 4)
+    beings = Beings([being_player], [being_enemy])
+    being_player.move_to(3, 3)
+    being_enemy.move_to(5, 4)
+    assert beings.find_being_by_cell_position(2, 3) is None
+    assert beings.find_being_by_cell_position(3, 3) is being_player
+    assert beings.find_being_by_cell_position(5, 4) is being_enemy
+    assert beings.find_player_by_px_position(224, 224) is being_player
+    assert beings.find_enemy_by_px_position(224, 224) is None
+    assert beings.find_enemy_by_px_position(352, 288) is being_enemy
+    beings.remove_enemy_being(being_enemy)
+    assert beings.find_being_by_cell_position(5, 4) is None
+
+
+def test_beings_on_the_same_cell():
+    enemy_1 = being.construct_beings(being.Enemy, 4, 4)
+    enemy_2 = being.construct_beings(being.Enemy, 5, 4)
+    beings = Beings([], [enemy_1, enemy_2])
+    enemy_2.move_to(4, 4)
+    assert beings.find_enemy_by_cell_position(4, 4) is enemy_1
+    enemy_1.move_to(3, 4)
+    assert beings.find_enemy_by_cell_position(4, 4) is enemy_2
+    assert beings.find_enemy_by_cell_position(3, 4) is enemy_1
+    assert beings.find_player_by_cell_position(3, 4) is None
+    beings.remove_enemy_being(enemy_2)
+    assert beings.find_being_by_cell_position(4, 4) is None
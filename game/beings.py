@@ -7,6 +7,7 @@ import arcade
 
 from . import being
 from . import constants
+from .components.position import Position
 
 
 class Beings:
@@ -24,12 +25,31 @@ class Beings:
         One can pass existing list of Being instances to Beings. By default, objects parameter is equal to None,
         and then the empty list is initialized.
 
+    Attributes:
+    -----------
+    _player_cells, _enemy_cells: dict of (int, int): list of Beings
+        Occupancy index of player and enemy Beings, keyed by their cell position. Lookups return the Being that came
+        to the cell first. It is kept up to date by add_..., remove_... methods and by Being.move_to (through
+        update_being_position), so player_beings and enemy_beings should not be modified directly.
+    version: int
+        Incremented every time Being is added, removed or moved, so cached data based on Beings positions (like
+        highlighted tiles in range of player) can be invalidated.
+    listeners: list
+        Objects notified (by being_added, being_removed and being_moved methods) when Being is added, removed
+        or moved, e.g. Occupancy used by Pathfinder.
+
     Methods:
     --------
     find_being_by_cell_position (int, int): Being
         Finds and returns any Being instance found on the specific coordinates. Arguments indicate the column and row
         of the game map.
 
+    find_player_by_cell_position, find_enemy_by_cell_position (int, int): Being
+        Same as find_being_by_cell_position, but only player or only enemy Beings are taken into account.
+
+    update_being_position (Being, Position)
+        Moves Being in the occupancy index from the old cell position to its current cell position.
+
     find_player_by_px_position (int, int): Being
         Finds and returns any Being instance found on the specific coordinates. Arguments indicate the center position
         of the sprite on the screen, using pixels.
@@ -65,13 +85,17 @@ class Beings:
 
     def __init__(self, player_beings=None, enemy_beings=None):
         self.owner = None
-        self.player_sprite_list = arcade.SpriteList()
+        self._player_cells = {}
+        self._enemy_cells = {}
+        self.version = 0
+        self.listeners = []
+        self._player_sprite_list = None
         self.player_beings = []
         # TODO: Rewrite GameObjects like that.
         if player_beings is not None:
             for player in player_beings:
                 self.add_player_being(player)
-        self.enemy_sprite_list = arcade.SpriteList()
+        self._enemy_sprite_list = None
         self.enemy_beings = []
         if enemy_beings is not None:
             for enemy in enemy_beings:
@@ -88,15 +112,28 @@ class Beings:
         Check if there is any Being instance (no matter, friend or foe) at the specific coords.
         Uses cell_position attribute. Returns Being instance or None.
         """
-        all_beings = self.player_beings + self.enemy_beings
-        return next(
-            (
-                b
-                for b in all_beings
-                if (b.cell_position.x == x and b.cell_position.y == y)
-            ),
-            None,
-        )
+        being_ = self.find_player_by_cell_position(x, y)
+        if being_ is None:
+            being_ = self.find_enemy_by_cell_position(x, y)
+        return being_
+
+    def find_player_by_cell_position(self, x, y):
+        return _first(self._player_cells, (x, y))
+
+    def find_enemy_by_cell_position(self, x, y):
+        return _first(self._enemy_cells, (x, y))
+
+    def update_being_position(self, being_, old_position):
+        """Called by Being.move_to to keep the occupancy index in sync with the Being cell_position."""
+        old_cell = (old_position.x, old_position.y)
+        cells = self._player_cells
+        if being_ in self._enemy_cells.get(old_cell, ()):
+            cells = self._enemy_cells
+        _remove_from_cell(cells, old_cell, being_)
+        _add_to_cell(cells, (being_.cell_position.x, being_.cell_position.y), being_)
+        self.version += 1
+        for listener in self.listeners:
+            listener.being_moved(being_, old_position)
 
     def find_being_by_px_position(self, x, y):
         being_ = self.find_player_by_px_position(x, y)
@@ -109,21 +146,8 @@ class Beings:
         Check if there is any friendly Being instance at the specific coords.
         Uses px_position attribute. Returns Being instance or None.
         """
-        min_x = x - (constants.TILE_SIZE_W / 2)
-        max_x = x + (constants.TILE_SIZE_W / 2)
-        min_y = y - (constants.TILE_SIZE_H / 2)
-        max_y = y + (constants.TILE_SIZE_H / 2)
-        return next(
-            (
-                b
-                for b in self.player_beings
-                if (
-                    min_x <= b.px_position.x <= max_x
-                    and min_y <= b.px_position.y <= max_y
-                )
-            ),
-            None,
-        )
+        cell_position = Position(x, y).return_px_to_cell()
+        return _first(self._player_cells, (cell_position.x, cell_position.y))
 
     def spawn_player_being(self, x=-1, y=-1):
         """
@@ -131,9 +155,9 @@ class Beings:
         if the place is occupied by other Being or MapObject, then it tries to spawn player again on random coordinates.
         """
         if x < 0:
-            x = random.randrange(0, constants.GRID_SIZE_W)
+            x = random.randrange(0, self.owner.grid.width)
         if y < 0:
-            y = random.randrange(0, constants.GRID_SIZE_H)
+            y = random.randrange(0, self.owner.grid.height)
         o = self.owner.grid.map_objects.find_map_object_by_cell_position(x, y)
         b = self.find_being_by_cell_position(x, y)
         if o is not None or b is not None:
@@ -144,33 +168,40 @@ class Beings:
 
     def add_player_being(self, player_being):
         self.player_beings.append(player_being)
-        self.player_sprite_list.append(player_being.sprite.arcade_sprite)
+        player_being.owner = self
+        _add_to_cell(
+            self._player_cells,
+            (player_being.cell_position.x, player_being.cell_position.y),
+            player_being,
+        )
+        self.version += 1
+        for listener in self.listeners:
+            listener.being_added(player_being)
+        if self._player_sprite_list is not None:
+            self._player_sprite_list.append(player_being.sprite.arcade_sprite)
 
     # TODO: Write a method to retrieve player_being (and map_object for that matter) by coords.
     def remove_player_being(self, player_being):
         self.player_beings.remove(player_being)
-        self.player_sprite_list.remove(player_being.sprite.arcade_sprite)
+        _remove_from_cell(
+            self._player_cells,
+            (player_being.cell_position.x, player_being.cell_position.y),
+            player_being,
+        )
+        player_being.owner = None
+        self.version += 1
+        for listener in self.listeners:
+            listener.being_removed(player_being)
+        if self._player_sprite_list is not None:
+            self._player_sprite_list.remove(player_being.sprite.arcade_sprite)
 
     def find_enemy_by_px_position(self, x, y):
         """
         Check if there is any enemy Being instance at the specific coords.
         Uses px_position attribute. Returns Being instance or None.
         """
-        min_x = x - (constants.TILE_SIZE_W / 2)
-        max_x = x + (constants.TILE_SIZE_W / 2)
-        min_y = y - (constants.TILE_SIZE_H / 2)
-        max_y = y + (constants.TILE_SIZE_H / 2)
-        return next(
-            (
-                b
-                for b in self.enemy_beings
-                if (
-                    min_x <= b.px_position.x <= max_x
-                    and min_y <= b.px_position.y <= max_y
-                )
-            ),
-            None,
-        )
+        cell_position = Position(x, y).return_px_to_cell()
+        return _first(self._enemy_cells, (cell_position.x, cell_position.y))
 
     def spawn_enemy_being(self, x=-1, y=-1):
         """
@@ -178,9 +209,9 @@ class Beings:
         if the place is occupied by other Being or MapObject, then it tries to spawn enemy again on random coordinates.
         """
         if x < 0:
-            x = random.randrange(0, constants.GRID_SIZE_W)
+            x = random.randrange(0, self.owner.grid.width)
         if y < 0:
-            y = random.randrange(0, constants.GRID_SIZE_H)
+            y = random.randrange(0, self.owner.grid.height)
         o = self.owner.grid.map_objects.find_map_object_by_cell_position(x, y)
         b = self.find_being_by_cell_position(x, y)
         if o is not None or b is not None:
@@ -191,8 +222,65 @@ class Beings:
 
     def add_enemy_being(self, enemy_being):
         self.enemy_beings.append(enemy_being)
-        self.enemy_sprite_list.append(enemy_being.sprite.arcade_sprite)
+        enemy_being.owner = self
+        _add_to_cell(
+            self._enemy_cells,
+            (enemy_being.cell_position.x, enemy_being.cell_position.y),
+            enemy_being,
+        )
+        self.version += 1
+        for listener in self.listeners:
+            listener.being_added(enemy_being)
+        if self._enemy_sprite_list is not None:
+            self._enemy_sprite_list.append(enemy_being.sprite.arcade_sprite)
 
     def remove_enemy_being(self, enemy_being):
         self.enemy_beings.remove(enemy_being)
-        self.enemy_sprite_list.remove(enemy_being.sprite.arcade_sprite)
+        _remove_from_cell(
+            self._enemy_cells,
+            (enemy_being.cell_position.x, enemy_being.cell_position.y),
+            enemy_being,
+        )
+        enemy_being.owner = None
+        self.version += 1
+        for listener in self.listeners:
+            listener.being_removed(enemy_being)
+        if self._enemy_sprite_list is not None:
+            self._enemy_sprite_list.remove(enemy_being.sprite.arcade_sprite)
+
+    @property
+    def player_sprite_list(self):
+        """SpriteList of player Beings is created on the first use, so textures are not loaded until drawn."""
+        if self._player_sprite_list is None:
+            self._player_sprite_list = arcade.SpriteList()
+            for player_being in self.player_beings:
+                self._player_sprite_list.append(player_being.sprite.arcade_sprite)
+        return self._player_sprite_list
+
+    @property
+    def enemy_sprite_list(self):
+        """SpriteList of enemy Beings is created on the first use, so textures are not loaded until drawn."""
+        if self._enemy_sprite_list is None:
+            self._enemy_sprite_list = arcade.SpriteList()
+            for enemy_being in self.enemy_beings:
+                self._enemy_sprite_list.append(enemy_being.sprite.arcade_sprite)
+        return self._enemy_sprite_list
+
+
+def _first(cells, cell):
+    beings_ = cells.get(cell)
+    if beings_:
+        return beings_[0]
+    return None
+
+
+def _add_to_cell(cells, cell, being_):
+    cells.setdefault(cell, []).append(being_)
+
+
+def _remove_from_cell(cells, cell, being_):
+    beings_ = cells.get(cell)
+    if beings_ is not None and being_ in beings_:
+        beings_.remove(being_)
+        if not beings_:
+            del cells[cell]
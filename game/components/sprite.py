@@ -10,6 +10,8 @@ class Sprite:
     """
     Sprite class holds all the data necessary to create an arcade.Sprite instance, ie:
     path-to-the-graphic, sprite position, and sprite scale.
+    arcade.Sprite is created lazily, on the first access to arcade_sprite, so objects that are never drawn
+    (e.g. during map generation, or when running the Simulation without a window) do not load textures.
 
     Parameters:
     -----------
@@ -20,6 +22,11 @@ class Sprite:
     scale: int or float
         Makes Sprite larger or smaller.
 
+    Attributes:
+    -----------
+    arcade_sprite: arcade.Sprite
+        Created by _load when accessed for the first time.
+
     Methods:
     --------
     _load
@@ -32,7 +39,15 @@ class Sprite:
         self.filename = filename
         self.position = position
         self.scale = scale
-        self.arcade_sprite = self._load()
+        self._arcade_sprite = None
+        self._loaded = False
+
+    @property
+    def arcade_sprite(self):
+        if not self._loaded:
+            self._arcade_sprite = self._load()
+            self._loaded = True
+        return self._arcade_sprite
 
     def _load(self):
         """Tries to create an Arcade Sprite using specific graphic."""
@@ -47,7 +62,8 @@ class Sprite:
             return arcade_sprite
 
     def update_position(self, position):
-        """Updates position of Sprite that is already set up."""
+        """Updates position of Sprite. If arcade_sprite is not created yet, it will use the new position once it is."""
         self.position = position
-        self.arcade_sprite.center_x = self.position.x
-        self.arcade_sprite.center_y = self.position.y
+        if self._arcade_sprite is not None:
+            self._arcade_sprite.center_x = self.position.x
+            self._arcade_sprite.center_y = self.position.y
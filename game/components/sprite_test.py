@@ -19,3 +19,18 @@ def test_valid_instance():
 
 def test_arcade_sprite_type():
     assert type(sprite.arcade_sprite) is arcade.sprite.Sprite
+
+
+def test_lazy_loading():
+    lazy_sprite = Sprite("test.png", Position(0, 0), 0.125)
+    assert lazy_sprite._arcade_sprite is None
+    lazy_sprite.update_position(Position(64, 32))
+    assert lazy_sprite.arcade_sprite.center_x == 64
+    assert lazy_sprite.arcade_sprite is lazy_sprite.arcade_sprite
+
+
+def test_texture_is_shared():
+    sprite_1 = Sprite("test.png", Position(0, 0), 0.125)
+    sprite_2 = Sprite("test.png", Position(64, 64), 0.5)
+    assert sprite_1.arcade_sprite.texture is sprite_2.arcade_sprite.texture
+    assert sprite_1.arcade_sprite.scale == 0.125 and sprite_2.arcade_sprite.scale == 0.5
@@ -20,16 +20,33 @@ SCREEN_HEIGHT = 600
 SCREEN_TITLE = "Untitle Strategy Game"
 
 # Drunkard's walk
-MAP_PERCENT = (GRID_SIZE_W * GRID_SIZE_H) / 100
-DIG_PERCENT_MIN = int(MAP_PERCENT * 55)
-DIG_PERCENT_MAX = int(MAP_PERCENT * 65)
+# Percent of the map cells to dig; the number of steps is calculated for the actual map size.
+DIG_PERCENT_MIN = 55
+DIG_PERCENT_MAX = 65
 DIG_PERCENT_QUADRANT_TOLERANCE_NEGATIVE = 40
 DIG_PERCENT_QUADRANT_TOLERANCE_POSITIVE = 40
+# Map is divided into MAP_CHECK_COLUMNS x MAP_CHECK_ROWS regions (quadrants by default) to check the uniformity.
+MAP_CHECK_COLUMNS = 2
+MAP_CHECK_ROWS = 2
 
 # Map
+# Number of buildings on the default map size, scaled with the map area.
 BUILDINGS_NUMBER_MIN = 5
 BUILDINGS_NUMBER_MAX = 7
+# Limit for the default map size, scaled by Grid for other sizes.
 LONGEST_VALID_PATH = 20
+# Maps with more empty cells than that have the longest path estimated (see pathfinding.estimate_longest_path)
+# instead of computed exactly.
+LONGEST_PATH_EXACT_CELLS = 1024
+MAP_GENERATION_MAX_ATTEMPTS = 10000
+# Number of worker processes generating map candidates; 1 generates them one by one in the current process.
+MAP_GENERATION_WORKERS = 1
+# Pre-generated maps, see map_cache module.
+MAP_CACHE_PATH = "./maps.jsonl"
+
+# Pathfinding
+# Number of search results remembered by PathCache.
+PATH_CACHE_SIZE = 256
 
 # Beings
 PLAYER_BEINGS_NO = 3
@@ -45,6 +62,12 @@ AI_RANGE_FALLOFF = 1
 AI_INFO_ORDER_PRIORITY = 0
 AI_INFO_ORDER_OBJECT = 1
 AI_INFO_ORDER_PATH = 2
+# Number of worker processes planning all enemies at the start of the enemy phase (see ai.plan_enemies);
+# 1 plans every enemy when it becomes active, in the current process, seeing moves of the previous enemies.
+AI_PLANNING_WORKERS = 1
+# Options of every enemy kept by ai.plan_enemies in addition to one per enemy, used when the paths of the best ones
+# pass through tiles taken by other enemies.
+AI_PLANNING_SPARE_OPTIONS = 8
 
 # FPS-related values
 FPS_RATE_DEFAULT = 1 / 60
@@ -16,14 +16,14 @@ class DrunkardsWalk:
 
     Parameters:
     -----------
-    owner: grid
-        Instance of Grid class that calls DrunkardsWalk.
+    owner: MapLayout
+        Instance of MapLayout (or any other object with width, height and dig method) that walker digs through.
     start_x, start_y: int
         Starting coords of walker. If not provided, coords will be created randomly within
         grid width and height.
     steps: int
         Number of steps that walker will take. If None is passed, steps take random value generated within
-        bounds specified in constants file.
+        bounds specified in constants file, as percent of the owner cells.
 
     Methods:
     --------
@@ -41,8 +41,10 @@ class DrunkardsWalk:
             self.start_y = random.randint(0, self.owner.height - 1)
         self.steps = steps
         if self.steps is None:
+            map_percent = (self.owner.width * self.owner.height) / 100
             self.steps = random.randint(
-                constants.DIG_PERCENT_MIN, constants.DIG_PERCENT_MAX
+                int(map_percent * constants.DIG_PERCENT_MIN),
+                int(map_percent * constants.DIG_PERCENT_MAX),
             )
         # Adjust the value below if you wish to allow diagonal movement.
         self.directions = [
@@ -55,25 +57,15 @@ class DrunkardsWalk:
     def walk(self):
         """
         Starts the algorithm at the given coordinates, then moves step-by-step, horizontally or vertically.
-        If new coords are valid (within the owner (grid) bounds), then remove the MapObject from this map cell.
+        If new coords are valid (within the owner (layout) bounds), then remove the object from this map cell.
         The walker will walk until all steps are taken.
         """
         # cur_x and cur_y are coords of Tile currently occupied by walker.
         cur_x = self.start_x
         cur_y = self.start_y
         while self.steps > 0:
-            # Check if there is an instance of MapObject here...
-            obj = next(
-                (
-                    obj
-                    for obj in self.owner.map_objects.objects
-                    if (obj.cell_position.x == cur_x and obj.cell_position.y == cur_y)
-                ),
-                None,
-            )
-            # ...and if it is, then remove the object from the list and decrement steps.
-            if obj:
-                self.owner.map_objects.remove_map_object(obj)
+            # Dig through the object here, and decrement steps if there was anything to dig.
+            if self.owner.dig(cur_x, cur_y):
                 self.steps -= 1
             # Continue even if the Tile has been cleared already.
             # Choose a new direction, and update cur_x and cur_y if valid.
@@ -5,3 +5,9 @@ class InvalidGameState(Exception):
     """Raised when the current game state is invalid, e.g. when global.state does not much other data."""
 
     pass
+
+
+class MapGenerationError(Exception):
+    """Raised when no valid map has been generated within the attempts budget."""
+
+    pass
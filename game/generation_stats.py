@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+
+class GenerationStats:
+    """
+    GenerationStats collects data about the map generation, so the acceptance thresholds in constants.py can be tuned
+    for the throughput. It is filled by Grid.generate_map.
+
+    Attributes:
+    -----------
+    attempts: int
+        Number of generated maps, including the accepted one.
+    accepted: bool
+        Was valid map found within the attempts budget?
+    cached: bool
+        Was the map loaded from MapCache instead of generated?
+    rejects: dict of str: int
+        How many maps were rejected, by the reason (name of the failed check).
+    timings: dict of str: float
+        Total time, in seconds, spent in every phase of map generation.
+
+    Methods:
+    --------
+    add_time (str, float)
+        Adds time spent in the phase.
+    add_reject (str)
+        Counts map rejected for the reason.
+    """
+
+    def __init__(self):
+        self.attempts = 0
+        self.accepted = False
+        self.cached = False
+        self.rejects = {}
+        self.timings = {}
+
+    def add_time(self, phase, seconds):
+        self.timings[phase] = self.timings.get(phase, 0) + seconds
+
+    def add_reject(self, reason):
+        self.rejects[reason] = self.rejects.get(reason, 0) + 1
+
+    def __repr__(self):
+        timings = ", ".join(f"{k}: {v:.4f}s" for k, v in self.timings.items())
+        return (
+            f"GenerationStats(attempts={self.attempts}, accepted={self.accepted}, cached={self.cached}, "
+            f"rejects={self.rejects}, timings={{{timings}}})"
+        )
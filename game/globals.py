@@ -1,7 +0,0 @@
-# -*- coding: utf-8 -*-
-
-
-from .states import State
-
-
-state = State.GENERATE_MAP
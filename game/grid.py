@@ -1,14 +1,20 @@
 # -*- coding: utf-8 -*-
 
 
-import itertools
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import arcade
 
 from . import constants
 from .components.position import Position
+from . import pathfinding
 from .drunkards_walk import DrunkardsWalk
-from .pathfinding import Pathfinder
+from .exceptions import MapGenerationError
+from .generation_stats import GenerationStats
+from .map_layout import MapLayout
+from .seeding import make_seed
 from .tile import Tile
 from .map_objects import MapObjects
 
@@ -37,12 +43,24 @@ class Grid:
         Initializes empty grid, using one basic Sprite, creating the foundations for further modifications.
     _initialize_map_objects
         Clears self.map_objects, then fills it with new instance of MapObjects.
+    occupancy: Occupancy
+        Walkable flags of the current map_objects, shared by all Pathfinder instances using this Grid.
+    tile_at (int, int): Tile
+        Returns Tile at the cell coords in O(1), or None if coords are out of the grid bounds.
     find_tile_by_position (Position): Tile
-        Tries to find element in self.tiles with Position matching the argument.
-    generate_map
-        Creates new DrunkardsWalk instance and lets him walk.
+        Tries to find element in self.tiles with Position matching the argument. Uses tile_at.
+    generate_map (int, int, str, MapCache): GenerationStats
+        Creates new MapLayout and DrunkardsWalk instance and lets him walk, until valid map is created or attempts
+        run out. Then creates MapObjects for the accepted layout. With more than one worker, candidates are generated
+        in parallel by _generate_map_parallel. If the seed is found in MapCache, the cached layout is used instead.
+    _generate_map_parallel (int, int, GenerationStats): MapLayout
+        Generates candidates in worker processes, from seeds derived from the current random state.
+    _make_candidate (int, int, GenerationStats): MapLayout
+        Runs DrunkardsWalk and places buildings on the new MapLayout.
     check_map: bool
-        After the map is created by DrunkardsWalk, check_map is called to validate the map.
+        Validates the current map_objects.
+    _find_reject_reason (MapLayout, GenerationStats): str
+        Returns name of the first check that the MapLayout fails, or None.
     """
 
     def __init__(
@@ -56,13 +74,25 @@ class Grid:
         self.position = Position(x, y)
         self.width = width
         self.height = height
-        self.sprite_list = arcade.SpriteList()
+        self._sprite_list = None
         self.tiles = self._init_empty_grid()
+        # Tiles are created row by row, from the bottom-left corner, so tile_rows[y][x] is Tile at (x, y).
+        self.tile_rows = [
+            self.tiles[y * self.width : (y + 1) * self.width]
+            for y in range(self.height)
+        ]
+        self.generation_stats = None
+        self._occupancy = None
+        # SearchBuffers for the short-living Pathfinder instances, like the ones used by AI.
+        self.workspace_pool = pathfinding.WorkspacePool(self.width, self.height)
+        self.path_cache = pathfinding.PathCache()
         self.map_objects = map_objects
         if self.map_objects is None:
             self.map_objects = MapObjects()
             self.map_objects.owner = self
             self.map_objects.fill_map()
+        else:
+            self.map_objects.owner = self
 
     def _init_empty_grid(self):
         """Initializes empty map, using the most basic terrain tile."""
@@ -79,93 +109,188 @@ class Grid:
                     "image_terrain_1_in_range.png",
                 )
                 tiles.append(tile)
-                self.sprite_list.append(tile.sprite.arcade_sprite)
         return tiles
 
-    def _initialize_map_objects(self):
+    @property
+    def sprite_list(self):
+        """SpriteList with terrain sprites is created on the first use, so textures are not loaded until drawn."""
+        if self._sprite_list is None:
+            self._sprite_list = arcade.SpriteList()
+            for tile in self.tiles:
+                self._sprite_list.append(tile.sprite.arcade_sprite)
+        return self._sprite_list
+
+    @property
+    def occupancy(self):
+        """
+        Occupancy is created on the first use. It follows self.map_objects, so the walkable flags are rebuilt
+        when the new map is generated.
+        """
+        if self._occupancy is None:
+            self._occupancy = pathfinding.Occupancy(self.width, self.height)
+        self._occupancy.attach_map_objects(self.map_objects)
+        return self._occupancy
+
+    def _initialize_map_objects(self, layout=None):
         """
         Start with setting the map_objects to None, then fill it with the basic MapObjects.
-        Used in generate_map method to clean up the map between recursions.
+        If MapLayout is passed, MapObjects are created for the layout instead; it is used in generate_map method
+        once the layout is accepted.
         """
         self.map_objects = None
         self.map_objects = MapObjects()
         self.map_objects.owner = self
-        self.map_objects.fill_map()
+        if layout is None:
+            self.map_objects.fill_map()
+        else:
+            self.map_objects.fill_from_layout(layout)
+
+    def tile_at(self, x, y):
+        """Returns Tile at the cell coords, or None if the coords are outside the grid."""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.tile_rows[y][x]
+        return None
 
     def find_tile_by_position(self, position):
         """
-        Takes an Position as an argument, then iterates over the self.tiles and returns Tile with matching Position.
+        Takes an Position as an argument and returns Tile with matching Position.
         Used by SpriteTracker / TilesSelected to find the Tiles in path returned by the Pathfinder.
         """
-        return next(
-            (
-                t
-                for t in self.tiles
-                if (position.x == t.cell_position.x and position.y == t.cell_position.y)
-            ),
-            None,
-        )
+        return self.tile_at(position.x, position.y)
 
-    def generate_map(self):
+    def generate_map(
+        self,
+        max_attempts=constants.MAP_GENERATION_MAX_ATTEMPTS,
+        workers=constants.MAP_GENERATION_WORKERS,
+        seed=None,
+        map_cache=None,
+    ):
+        """
+        Runs the drunkard's walk algorithm to generate a map. Carving, placing buildings and validation are done
+        on the compact MapLayout, and MapObject instances are created only for the accepted layout, so rejected
+        candidates (e.g. with Tile placement not uniform enough) are cheap. Raises MapGenerationError if no valid map
+        is found in max_attempts. Returns GenerationStats, that is also stored in self.generation_stats.
+        If workers is greater than 1, candidates are generated in parallel (see _generate_map_parallel). The map is
+        then still deterministic for the given seed, but differs from the one generated with a single worker.
+        If the game seed and MapCache are passed and the seed is cached, the map is loaded from the cache, and random
+        module is set to the state it would have after generating this map.
+        """
+        stats = GenerationStats()
+        self.generation_stats = stats
+        cached = None
+        if seed is not None and map_cache is not None:
+            cached = map_cache.get(seed, self.width, self.height, workers > 1)
+        if cached is not None:
+            layout, random_state = cached
+            random.setstate(random_state)
+            stats.cached = True
+        elif workers > 1:
+            layout = self._generate_map_parallel(max_attempts, workers, stats)
+        else:
+            layout = None
+            while layout is None and stats.attempts < max_attempts:
+                stats.attempts += 1
+                candidate = self._make_candidate(self.width, self.height, stats)
+                reason = self._find_reject_reason(candidate, stats)
+                if reason is None:
+                    layout = candidate
+                else:
+                    stats.add_reject(reason)
+        if layout is None:
+            raise MapGenerationError(
+                f"No valid map found in {max_attempts} attempts: {stats}"
+            )
+        start = time.perf_counter()
+        self._initialize_map_objects(layout)
+        stats.add_time("map objects", time.perf_counter() - start)
+        stats.accepted = True
+        return stats
+
+    def _generate_map_parallel(self, max_attempts, workers, stats):
         """
-        Runs the drunkard's walk algorithm to generate a map. If the map is not valid (e.g. Tile placement is
-        not uniform enough), then map_objects are reset and generate_map is recursively called again.
+        Generates and validates candidates in batches of `workers` processes. Every candidate has its own seed, drawn
+        from the separate stream seeded once from the global random state, and the first valid candidate in the order
+        of seeds is accepted. So the accepted map does not depend on the number of workers or on which process
+        finishes first, and the global random state is advanced the same way every time.
+        Returns the accepted MapLayout, or None if attempts run out.
         """
-        walker = DrunkardsWalk(owner=self, start_x=0, start_y=0)
+        seeds = random.Random(make_seed(4, 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while stats.attempts < max_attempts:
+                batch = [
+                    make_seed(4, 4, seeds)
+                    for i in range(min(workers, max_attempts - stats.attempts))
+                ]
+                results = executor.map(
+                    _generate_candidate,
+                    batch,
+                    [self.width] * len(batch),
+                    [self.height] * len(batch),
+                )
+                for layout, reason, timings in results:
+                    stats.attempts += 1
+                    for phase, seconds in timings.items():
+                        stats.add_time(phase, seconds)
+                    if reason is None:
+                        return layout
+                    stats.add_reject(reason)
+        return None
+
+    @staticmethod
+    def _make_candidate(width, height, stats):
+        """Carves the new MapLayout with DrunkardsWalk, then places buildings on it."""
+        start = time.perf_counter()
+        layout = MapLayout(width, height)
+        walker = DrunkardsWalk(owner=layout, start_x=0, start_y=0)
         walker.walk()
-        self.map_objects.add_buildings()
-        if not self.check_map():
-            self._initialize_map_objects()
-            self.generate_map()
+        stats.add_time("walk", time.perf_counter() - start)
+        start = time.perf_counter()
+        layout.add_buildings()
+        stats.add_time("buildings", time.perf_counter() - start)
+        return layout
 
     def check_map(self):
         """
-        Check of uniformity of objects removal. The map is divided into four quadrants. This method counts
-        MapObject instances remaining on each quadrant, calcs the average, then checks if every quadrant is within
+        Check of uniformity of objects removal. The map is divided into regions (four quadrants by default). This method
+        counts MapObject instances remaining on each region, calcs the average, then checks if every region is within
         the bounds (average - negative-tolerance, average + positive tolerance). Returns a bool.
+        Then checks the longest of the shortest paths between empty tiles, to avoid player to navigate
+        through circles.
         TODO: Check if this is overkill for a such small maps. Perhaps could be merged with drunkard's walk?
-        TODO: Check the longest path from A to B, to avoid player to navigate through circles.
-        """
-        # Declare the quadrants.
-        quadrant_1 = [0, self.width // 2 - 1, 0, self.height // 2 - 1]
-        quadrant_2 = [self.width // 2, self.width - 1, 0, self.height // 2 - 1]
-        quadrant_3 = [
-            self.width // 2,
-            self.width - 1,
-            self.height // 2,
-            self.height - 1,
-        ]
-        quadrant_4 = [0, self.width // 2 - 1, self.height // 2, self.height - 1]
-        # Every quadrants have its own counter, and after iterating over all the Tiles in quadrant,
-        # the counter is added to the `count` list.
-        count = []
-        total = 0
-        quadrants = [
-            quadrant_1,
-            quadrant_2,
-            quadrant_3,
-            quadrant_4,
+        """
+        layout = MapLayout.from_map_objects(self.map_objects, self.width, self.height)
+        return self._find_reject_reason(layout) is None
+
+    @staticmethod
+    def _find_reject_reason(layout, stats=None):
+        """
+        Runs all checks of check_map on the MapLayout, one by one. Returns name of the first failed check, or None
+        if the map is valid. If GenerationStats are passed, time spent on every check is added to them.
+        """
+        checks = [
+            ("regions", Grid._check_regions),
+            ("longest path", Grid._check_longest_path),
         ]
-        for quadrant in quadrants:
-            counter = 0
-            for x in range(quadrant[0], quadrant[1], 1):
-                for y in range(quadrant[2], quadrant[3], 1):
-                    # For every Tile in the current quadrant, check if there is object on this Tile.
-                    obj = next(
-                        (
-                            obj
-                            for obj in self.map_objects.objects
-                            if (obj.cell_position.x == x and obj.cell_position.y == y)
-                        ),
-                        None,
-                    )
-                    # If object is found, increment the quadrant's counter.
-                    if obj:
-                        counter += 1
-            count.append(counter)
-            total += counter
-        # After iterating over all four quadrants, calculate the average percentage of occupied terrain.
-        average = total / len(quadrants)
+        for name, check in checks:
+            start = time.perf_counter()
+            valid = check(layout)
+            if stats is not None:
+                stats.add_time(name, time.perf_counter() - start)
+            if not valid:
+                return name
+        return None
+
+    @staticmethod
+    def _check_regions(layout):
+        """
+        Checks if objects are spread uniformly enough between the regions of the map (quadrants, by default).
+        Counts are found using the summed-area table of the MapLayout, so every cell is visited once.
+        """
+        count = layout.region_counts(
+            constants.MAP_CHECK_COLUMNS, constants.MAP_CHECK_ROWS
+        )
+        # Calculate the average number of objects per region.
+        average = sum(count) / len(count)
         percent = average / 100
         # Then, check if uniformity of MapObject placement is withing specified in constant.py bounds.
         acceptable_minimum = average - (
@@ -177,43 +302,43 @@ class Grid:
         for c in count:
             if c < acceptable_minimum or c > acceptable_maximum:
                 return False  # Invalid map
-        # Find the longest possible path on the given map.
-        longest_path = 0
-        pathfinder = Pathfinder(self)
-        pathfinder.clean_up_path_grid()
-        for a, b in itertools.combinations(self.tiles, 2):
-            # Exclude tiles that are already occupied by MapObject instances.
-            obj_on_a = next(
-                (
-                    obj
-                    for obj in self.map_objects.objects
-                    if (
-                        obj.cell_position.x == a.cell_position.x
-                        and obj.cell_position.y == a.cell_position.y
-                    )
-                ),
-                None,
+        return True
+
+    @staticmethod
+    def _check_longest_path(layout):
+        """
+        Checks if the longest of the shortest paths between empty tiles is not too long. On large maps the length is
+        estimated, as the exact search takes O(V^2).
+        """
+        # Find the longest possible path between the tiles that are not occupied by objects.
+        empty_cells = layout.empty_cells()
+        if len(empty_cells) > constants.LONGEST_PATH_EXACT_CELLS:
+            longest_path = pathfinding.estimate_longest_path(
+                layout.width, layout.height, layout.walkable()
             )
-            obj_on_b = next(
-                (
-                    obj
-                    for obj in self.map_objects.objects
-                    if (
-                        obj.cell_position.x == b.cell_position.x
-                        and obj.cell_position.y == b.cell_position.y
-                    )
-                ),
-                None,
+        else:
+            longest_path = pathfinding.find_longest_path(
+                layout.width, layout.height, layout.walkable(), empty_cells
             )
-            if obj_on_a or obj_on_b:
-                continue
-            # Then find the path.
-            path, runs = pathfinder.find_path(a.cell_position, b.cell_position)
-            pathfinder.clean_up_path_grid()
-            if len(path) > longest_path:
-                longest_path = len(path)
-        pathfinder.last_path = ()
-        # Discard the map if the longest found path is too long.
-        if longest_path > constants.LONGEST_VALID_PATH:
+        # Discard the map if the longest found path is too long. The limit is set for the default map size,
+        # and grows with the width and height of the map.
+        limit = (
+            constants.LONGEST_VALID_PATH
+            * (layout.width + layout.height)
+            / (constants.GRID_SIZE_W + constants.GRID_SIZE_H)
+        )
+        if longest_path > limit:
             return False
         return True  # Valid map
+
+
+def _generate_candidate(seed, width, height):
+    """
+    Generates and validates one map candidate from the seed. It is run in the worker process by
+    Grid._generate_map_parallel. Returns the MapLayout, name of the failed check (or None) and timings of the phases.
+    """
+    random.seed(seed)
+    stats = GenerationStats()
+    layout = Grid._make_candidate(width, height, stats)
+    reason = Grid._find_reject_reason(layout, stats)
+    return layout, reason, stats.timings
@@ -1,11 +1,16 @@
 # -*- coding: utf-8 -*-
 
 
+import random
+import time
+
 import arcade
+import pytest
 
+from game import constants
+from game.exceptions import MapGenerationError
 from game.grid import Grid
 
-
 grid = Grid(5, 10, 15, 20)
 
 
@@ -19,3 +24,58 @@ def test_grid_sprite_list_type():
 
 def test_grid_tiles_amount():
     assert len(grid.tiles) == 300
+
+
+def test_grid_tile_at():
+    tile = grid.tile_at(14, 3)
+    assert tile.cell_position.x == 14 and tile.cell_position.y == 3
+    assert grid.tile_rows[3][14] is tile
+    assert grid.tile_at(15, 3) is None and grid.tile_at(-1, 0) is None
+
+
+def test_generate_map_stats():
+    random.seed("TEST-SEED")
+    generated = Grid()
+    stats = generated.generate_map()
+    assert stats is generated.generation_stats
+    assert stats.accepted
+    assert stats.attempts == sum(stats.rejects.values()) + 1
+    assert "walk" in stats.timings and "longest path" in stats.timings
+    assert generated.check_map()
+
+
+def test_generate_map_attempts_budget():
+    with pytest.raises(MapGenerationError):
+        Grid().generate_map(max_attempts=0)
+
+
+def _objects_layout(grid):
+    return sorted(
+        (obj.cell_position.x, obj.cell_position.y, obj.target)
+        for obj in grid.map_objects.objects
+    )
+
+
+def test_generate_map_parallel_deterministic():
+    generated = []
+    for workers in (2, 3):
+        random.seed("TEST-SEED")
+        grid = Grid()
+        stats = grid.generate_map(workers=workers)
+        assert stats.accepted and grid.check_map()
+        generated.append((_objects_layout(grid), stats.attempts, random.random()))
+    assert generated[0] == generated[1]
+
+
+def test_generate_large_map():
+    random.seed("TEST-SEED")
+    grid = Grid(width=128, height=96)
+    start = time.perf_counter()
+    stats = grid.generate_map()
+    assert stats.accepted
+    # Longest path is estimated on the large maps, so generation stays well below the O(V^2) cost.
+    assert time.perf_counter() - start < 10
+    assert len(grid.tiles) == 128 * 96
+    # Number of buildings grows with the map area (192 times the default map).
+    buildings = sum(obj.target for obj in grid.map_objects.objects)
+    assert buildings > constants.BUILDINGS_NUMBER_MAX * 100
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+
+from . import constants
+
+
+class InfluenceMap:
+    """
+    InfluenceMap is a layered view of the map used by AI to score the tiles. Layers are flat lists indexed
+    by y * width + x, built from Beings and MapObjects (and patched cell by cell when they change), so scoring
+    the attack does not need to look up Beings and MapObject instances cell by cell: priority of every attack effect
+    is just a sum of layer values over the affected cells.
+
+    Parameters:
+    -----------
+    grid: Grid
+        Current map, with its MapObjects.
+    beings: Beings
+        All player and enemy Beings.
+
+    Attributes:
+    -----------
+    scores: list of int
+        Change of priority when the cell is affected by attack: bonus for hitting the player Being (bigger if it may
+        be killed) and targetable MapObject, penalty for hitting the enemy Being.
+    targets: list of tuples
+        Player Beings and targetable MapObject instances on the cell, in the order they are reported by AI.
+
+    Methods:
+    --------
+    update_cell (int, int)
+        Recalculates scores and targets of the cell from the current Beings and MapObjects.
+    """
+
+    def __init__(self, grid, beings):
+        self.width = grid.width
+        self.height = grid.height
+        self.beings = beings
+        self.map_objects = grid.map_objects
+        size = self.width * self.height
+        self.scores = [0] * size
+        self.targets = [()] * size
+        cells = set()
+        for being_ in beings.player_beings + beings.enemy_beings:
+            cells.add((being_.cell_position.x, being_.cell_position.y))
+        for obj in self.map_objects.objects:
+            if obj.target:
+                cells.add((obj.cell_position.x, obj.cell_position.y))
+        for x, y in cells:
+            self.update_cell(x, y)
+
+    def update_cell(self, x, y):
+        """
+        Recalculates layers of the cell. Called for every occupied cell on creation, then by TurnContext whenever
+        Being or MapObject on the cell changes.
+        """
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return
+        index = y * self.width + x
+        score = 0
+        targets = ()
+        # Only one Being and one MapObject per cell is taken into account - the same that lookups by cell position
+        # return.
+        player = self.beings.find_player_by_cell_position(x, y)
+        if player is not None:
+            targets = (player,)
+            # Every AttackEffect takes exactly 1 hp, so the player with 1 hp left is killed by any hit.
+            if player.hp <= 0:
+                pass
+            elif player.hp == 1:
+                score += constants.AI_KILL_PLAYER_PRIORITY
+            else:
+                score += constants.AI_ATTACK_PLAYER_PRIORITY
+        elif self.beings.find_enemy_by_cell_position(x, y) is not None:
+            score -= constants.AI_ATTACK_OWN_PRIORITY
+        obj = self.map_objects.find_map_object_by_cell_position(x, y)
+        if obj is not None and obj.target:
+            targets = targets + (obj,)
+            score += constants.AI_BUILDING_PRIORITY
+        self.scores[index] = score
+        self.targets[index] = targets
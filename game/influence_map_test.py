@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+
+from . import constants
+from .being import construct_beings, Enemy, Player
+from .beings import Beings
+from .grid import Grid
+from .influence_map import InfluenceMap
+from .map_object import MapObject
+from .map_objects import MapObjects
+
+
+def test_influence_map_scores():
+    map_objects = MapObjects()
+    building = MapObject(
+        3, 0, "test.png", "test_selected.png", "test_targeted.png", target=True
+    )
+    map_objects.add_map_object(building)
+    grid = Grid(width=8, height=8, map_objects=map_objects)
+    player = construct_beings(Player, 1, 1)
+    weak_player = construct_beings(Player, 2, 2)
+    weak_player.hp = 1
+    enemy = construct_beings(Enemy, 3, 1)
+    influence = InfluenceMap(grid, Beings([player, weak_player], [enemy]))
+    assert influence.scores[1 * 8 + 1] == constants.AI_ATTACK_PLAYER_PRIORITY
+    assert influence.scores[2 * 8 + 2] == constants.AI_KILL_PLAYER_PRIORITY
+    assert influence.scores[1 * 8 + 3] == -constants.AI_ATTACK_OWN_PRIORITY
+    assert influence.scores[0 * 8 + 3] == constants.AI_BUILDING_PRIORITY
+    assert influence.targets[0 * 8 + 3] == (building,)
+    assert influence.targets[1 * 8 + 1] == (player,)
+    assert influence.targets[1 * 8 + 3] == ()
+    assert influence.scores[0] == 0 and influence.targets[0] == ()
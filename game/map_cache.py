@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import struct
+
+from . import constants
+from .grid import Grid
+from .map_layout import MapLayout
+
+# Bumped whenever the map generation changes in a way that the constants below do not capture.
+FORMAT_VERSION = 3
+# Constants the generated map depends on; see generation_key.
+GENERATION_CONSTANTS = (
+    "DIG_PERCENT_MIN",
+    "DIG_PERCENT_MAX",
+    "DIG_PERCENT_QUADRANT_TOLERANCE_NEGATIVE",
+    "DIG_PERCENT_QUADRANT_TOLERANCE_POSITIVE",
+    "MAP_CHECK_COLUMNS",
+    "MAP_CHECK_ROWS",
+    "BUILDINGS_NUMBER_MIN",
+    "BUILDINGS_NUMBER_MAX",
+    "LONGEST_VALID_PATH",
+    "LONGEST_PATH_EXACT_CELLS",
+    "GRID_SIZE_W",
+    "GRID_SIZE_H",
+)
+
+
+def generation_key():
+    """
+    Returns short hash of FORMAT_VERSION and of the current values of GENERATION_CONSTANTS. Entries of MapCache
+    generated with another key would not be produced (or accepted) by the current generator.
+    """
+    values = [FORMAT_VERSION] + [
+        getattr(constants, name) for name in GENERATION_CONSTANTS
+    ]
+    return hashlib.sha1(json.dumps(values).encode("utf-8")).hexdigest()[:16]
+
+
+class MapCache:
+    """
+    MapCache stores pre-generated maps on disk, so the map for a known seed is loaded instead of generated again.
+    The file is in JSON-lines format, one map per line. Besides the layout, every entry stores the state of random
+    module right after the map generation, so Beings spawned after the loaded map are the same as after the generated
+    one. Every entry stores the generation_key it was generated with; entries with a different key are skipped on
+    load, so they are generated again (and overwritten on save) after the map generation constants change.
+
+    Parameters:
+    -----------
+    path: str
+        Path to the cache file. If the file exists, it is loaded on creation.
+
+    Attributes:
+    -----------
+    generation: str
+        The current generation_key.
+    entries: dict of tuple: dict
+        Decoded lines of the cache file, keyed by (seed, width, height, parallel).
+    stale: int
+        Number of entries skipped on load, because they were generated with another generation_key.
+
+    Methods:
+    --------
+    load
+        Reads entries from the cache file, skipping the stale ones.
+    save
+        Writes all entries to the cache file.
+    get (str, int, int, bool): tuple
+        Returns MapLayout and random state for the seed, or None if the seed is not cached.
+    add (str, MapLayout, tuple, bool)
+        Stores MapLayout and random state for the seed.
+    """
+
+    def __init__(self, path=constants.MAP_CACHE_PATH):
+        self.path = path
+        self.generation = generation_key()
+        self.entries = {}
+        self.stale = 0
+        if os.path.exists(self.path):
+            self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _key(seed, width, height, parallel):
+        return (seed, width, height, parallel)
+
+    def load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry.get("generation") != self.generation:
+                    self.stale += 1
+                    continue
+                key = self._key(
+                    entry["seed"], entry["width"], entry["height"], entry["parallel"]
+                )
+                self.entries[key] = entry
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def get(self, seed, width, height, parallel=False):
+        entry = self.entries.get(self._key(seed, width, height, parallel))
+        if entry is None:
+            return None
+        layout = MapLayout(width, height)
+        layout.cells = bytearray(int(value) for value in entry["cells"])
+        layout.buildings = [tuple(cell) for cell in entry["buildings"]]
+        return layout, _decode_random_state(entry["random_state"])
+
+    def add(self, seed, layout, random_state, parallel=False):
+        key = self._key(seed, layout.width, layout.height, parallel)
+        self.entries[key] = {
+            "seed": seed,
+            "generation": self.generation,
+            "width": layout.width,
+            "height": layout.height,
+            "parallel": parallel,
+            # Cell values are single digits, see map_layout module.
+            "cells": "".join(str(value) for value in layout.cells),
+            "buildings": layout.buildings,
+            "random_state": _encode_random_state(random_state),
+        }
+
+
+def _encode_random_state(state):
+    """Packs the state returned by random.getstate into JSON-friendly list, with the internal state as base64 string."""
+    version, internal, gauss_next = state
+    packed = base64.b64encode(struct.pack(f"<{len(internal)}I", *internal))
+    return [version, packed.decode("ascii"), gauss_next]
+
+
+def _decode_random_state(data):
+    version, packed, gauss_next = data
+    raw = base64.b64decode(packed)
+    internal = struct.unpack(f"<{len(raw) // 4}I", raw)
+    return (version, internal, gauss_next)
+
+
+def pregenerate(seeds, map_cache, workers=constants.MAP_GENERATION_WORKERS):
+    """
+    Generates maps for the seeds the same way as the game does, and adds them to the MapCache.
+    Seeds that are already cached are skipped. Returns number of generated maps.
+    """
+    generated = 0
+    for seed in seeds:
+        grid = Grid()
+        parallel = workers > 1
+        if map_cache.get(seed, grid.width, grid.height, parallel) is not None:
+            continue
+        random.seed(seed)
+        grid.generate_map(workers=workers)
+        layout = MapLayout.from_map_objects(grid.map_objects, grid.width, grid.height)
+        map_cache.add(seed, layout, random.getstate(), parallel)
+        generated += 1
+    return generated
+
+
+def main(argv=None):
+    """Command line interface: python -m game.map_cache SEED [SEED ...] [--output PATH] [--workers N]"""
+    parser = argparse.ArgumentParser(
+        description="Pre-generates maps for the seeds into the map cache."
+    )
+    parser.add_argument("seeds", nargs="+", help="game seeds, e.g. ABCD-EFGH-IJKL-MNOP")
+    parser.add_argument("--output", default=constants.MAP_CACHE_PATH)
+    parser.add_argument("--workers", type=int, default=constants.MAP_GENERATION_WORKERS)
+    args = parser.parse_args(argv)
+    map_cache = MapCache(args.output)
+    generated = pregenerate(args.seeds, map_cache, args.workers)
+    map_cache.save()
+    if map_cache.stale:
+        print(f"Dropped {map_cache.stale} maps generated with other constants.")
+    print(f"Generated {generated} maps, {len(map_cache)} maps in {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+
+import random
+
+from game import constants
+from game.grid import Grid
+from game.map_cache import MapCache, pregenerate
+
+
+def test_map_cache_round_trip(tmp_path):
+    path = str(tmp_path / "maps.jsonl")
+    map_cache = MapCache(path)
+    assert pregenerate(["TEST-SEED"], map_cache) == 1
+    assert pregenerate(["TEST-SEED"], map_cache) == 0
+    map_cache.save()
+    generated_state = random.random()
+
+    random.seed("TEST-SEED")
+    generated = Grid()
+    generated.generate_map()
+
+    random.seed("OTHER-SEED")
+    loaded = Grid()
+    stats = loaded.generate_map(seed="TEST-SEED", map_cache=MapCache(path))
+    assert stats.cached and stats.attempts == 0
+    assert random.random() == generated_state
+    assert [
+        (obj.cell_position.x, obj.cell_position.y, obj.target)
+        for obj in loaded.map_objects.objects
+    ] == [
+        (obj.cell_position.x, obj.cell_position.y, obj.target)
+        for obj in generated.map_objects.objects
+    ]
+
+
+def test_map_cache_unknown_seed(tmp_path):
+    map_cache = MapCache(str(tmp_path / "maps.jsonl"))
+    assert map_cache.get("TEST-SEED", 8, 8) is None
+    random.seed("TEST-SEED")
+    stats = Grid().generate_map(seed="TEST-SEED", map_cache=map_cache)
+    assert not stats.cached and stats.attempts > 0
+
+
+def test_map_cache_skips_stale_entries(tmp_path, monkeypatch):
+    path = str(tmp_path / "maps.jsonl")
+    map_cache = MapCache(path)
+    pregenerate(["TEST-SEED"], map_cache)
+    map_cache.save()
+    monkeypatch.setattr(constants, "DIG_PERCENT_MIN", constants.DIG_PERCENT_MIN - 1)
+    map_cache = MapCache(path)
+    assert map_cache.stale == 1 and len(map_cache) == 0
+    assert map_cache.get("TEST-SEED", 8, 8) is None
+    assert pregenerate(["TEST-SEED"], map_cache) == 1
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+
+import random
+
+from . import constants
+
+# Values stored in MapLayout.cells.
+EMPTY = 0
+MOUNTAIN = 1
+BUILDING = 2
+
+
+def buildings_number(width, height):
+    """
+    Draws the number of buildings for the map. BUILDINGS_NUMBER_MIN and BUILDINGS_NUMBER_MAX are set for the default
+    map size, and are scaled with the area of the map.
+    """
+    scale = width * height / (constants.GRID_SIZE_W * constants.GRID_SIZE_H)
+    return random.randint(
+        max(1, round(constants.BUILDINGS_NUMBER_MIN * scale)),
+        max(1, round(constants.BUILDINGS_NUMBER_MAX * scale)),
+    )
+
+
+class MapLayout:
+    """
+    MapLayout is a compact representation of the map used during the map generation. Every cell is a single byte,
+    so carving, placing buildings and validation of the map candidate are cheap, and MapObject instances are created
+    only for the accepted layout (see MapObjects.fill_from_layout).
+
+    Parameters:
+    -----------
+    width, height: int
+        Dimensions of map, in cells.
+
+    Attributes:
+    -----------
+    cells: bytearray
+        One of EMPTY, MOUNTAIN, BUILDING for every cell, indexed by y * width + x. New layout is filled with mountains.
+    buildings: list of tuples
+        Cells of buildings, in the order they were placed.
+
+    Methods:
+    --------
+    from_map_objects (MapObjects, int, int): MapLayout
+        Creates layout that represents already existing MapObjects.
+    get (int, int): int
+        Returns value of the cell.
+    dig (int, int): bool
+        Removes object from the cell. Returns True if there was anything to remove.
+    occupied_cells: list of tuples
+        Returns all cells that are not empty, row by row, from the bottom-left corner.
+    empty_cells: list of tuples
+        Returns all empty cells, row by row, from the bottom-left corner.
+    walkable: bytearray
+        Returns flags of the empty cells, as used by functions in pathfinding module.
+    summed_area_table: list of int
+        Returns summed-area table of the occupied cells.
+    region_counts (int, int): list of int
+        Divides the layout into regions and returns number of occupied cells in every region.
+    add_buildings
+        Replaces some of the mountains with buildings.
+    _has_access_to_empty_tile (int, int): bool
+        Checks if at least one of the adjacent cells is empty.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.cells = bytearray([MOUNTAIN]) * (width * height)
+        self.buildings = []
+
+    @classmethod
+    def from_map_objects(cls, map_objects, width, height):
+        layout = cls(width, height)
+        layout.cells = bytearray(width * height)
+        for obj in map_objects.objects:
+            value = MOUNTAIN
+            if obj.target:
+                value = BUILDING
+                layout.buildings.append((obj.cell_position.x, obj.cell_position.y))
+            layout.cells[obj.cell_position.y * width + obj.cell_position.x] = value
+        return layout
+
+    def get(self, x, y):
+        return self.cells[y * self.width + x]
+
+    def dig(self, x, y):
+        index = y * self.width + x
+        if self.cells[index] == EMPTY:
+            return False
+        self.cells[index] = EMPTY
+        return True
+
+    def occupied_cells(self):
+        return [
+            (i % self.width, i // self.width)
+            for i, value in enumerate(self.cells)
+            if value != EMPTY
+        ]
+
+    def empty_cells(self):
+        return [
+            (i % self.width, i // self.width)
+            for i, value in enumerate(self.cells)
+            if value == EMPTY
+        ]
+
+    def walkable(self):
+        return bytearray(value == EMPTY for value in self.cells)
+
+    def summed_area_table(self):
+        """
+        Returns flat table of (width + 1) * (height + 1) numbers, where table[y * (width + 1) + x] is the number
+        of occupied cells with coords lower than (x, y). Sum over any rectangle of cells is then found in O(1).
+        """
+        stride = self.width + 1
+        table = [0] * (stride * (self.height + 1))
+        for y in range(self.height):
+            row_sum = 0
+            row = y * self.width
+            above = y * stride
+            for x in range(self.width):
+                if self.cells[row + x] != EMPTY:
+                    row_sum += 1
+                table[above + stride + x + 1] = table[above + x + 1] + row_sum
+        return table
+
+    def region_counts(self, columns, rows):
+        """
+        Divides the layout into columns x rows regions, as equal as possible, and returns number of occupied cells
+        in every region, row by row, from the bottom-left region. Every cell belongs to exactly one region.
+        """
+        table = self.summed_area_table()
+        stride = self.width + 1
+        xs = [i * self.width // columns for i in range(columns + 1)]
+        ys = [i * self.height // rows for i in range(rows + 1)]
+        counts = []
+        for y0, y1 in zip(ys, ys[1:]):
+            for x0, x1 in zip(xs, xs[1:]):
+                counts.append(
+                    table[y1 * stride + x1]
+                    - table[y0 * stride + x1]
+                    - table[y1 * stride + x0]
+                    + table[y0 * stride + x0]
+                )
+        return counts
+
+    def add_buildings(self):
+        """
+        Adds buildings to the map by replacing mountains by buildings. A valid place to spawn a building is
+        a mountain that has access to at least one empty cell.
+        Uses random module the same way as MapObjects.add_buildings does, so the same seed results in the same map.
+        """
+        buildings_num = buildings_number(self.width, self.height)
+        cells = self.occupied_cells()
+        random.shuffle(cells)
+        while buildings_num > 0:
+            try:
+                x, y = cells.pop()
+            except IndexError:
+                break
+            if self._has_access_to_empty_tile(x, y):
+                self.cells[y * self.width + x] = BUILDING
+                self.buildings.append((x, y))
+                buildings_num -= 1
+
+    def _has_access_to_empty_tile(self, x, y):
+        for nx, ny in ((x - 1, y), (x + 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= nx < self.width and 0 <= ny < self.height:
+                if self.cells[ny * self.width + nx] == EMPTY:
+                    return True
+        return False
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+
+import random
+
+from game import constants
+from game import map_layout
+from game.map_layout import MapLayout
+from game.map_objects import MapObjects
+
+
+def test_map_layout_dig():
+    layout = MapLayout(4, 3)
+    assert layout.get(2, 1) == map_layout.MOUNTAIN
+    assert layout.dig(2, 1)
+    assert not layout.dig(2, 1)
+    assert layout.get(2, 1) == map_layout.EMPTY
+    assert layout.empty_cells() == [(2, 1)]
+    assert layout.walkable()[1 * 4 + 2] == 1
+    assert len(layout.occupied_cells()) == 11
+
+
+def test_map_layout_add_buildings():
+    random.seed("TEST-SEED")
+    layout = MapLayout(6, 6)
+    for x in range(6):
+        layout.dig(x, 3)
+    layout.add_buildings()
+    assert layout.buildings
+    for x, y in layout.buildings:
+        assert layout.get(x, y) == map_layout.BUILDING
+        assert y in (2, 4)
+
+
+def test_map_layout_from_map_objects():
+    layout = MapLayout(5, 5)
+    layout.dig(1, 1)
+    layout.dig(1, 2)
+    layout.cells[2 * 5 + 2] = map_layout.BUILDING
+    layout.buildings.append((2, 2))
+    map_objects = MapObjects()
+    map_objects.fill_from_layout(layout)
+    assert len(map_objects.objects) == 23
+    assert map_objects.find_map_object_by_cell_position(2, 2).target
+    copy = MapLayout.from_map_objects(map_objects, 5, 5)
+    assert copy.cells == layout.cells and copy.buildings == layout.buildings
+
+
+def test_map_layout_region_counts():
+    random.seed("TEST-SEED")
+    layout = MapLayout(9, 7)
+    for i in range(30):
+        layout.dig(random.randrange(9), random.randrange(7))
+    assert layout.region_counts(1, 1) == [len(layout.occupied_cells())]
+    for columns, rows in ((2, 2), (3, 2), (4, 3)):
+        xs = [i * 9 // columns for i in range(columns + 1)]
+        ys = [i * 7 // rows for i in range(rows + 1)]
+        expected = [
+            sum(1 for x, y in layout.occupied_cells() if x0 <= x < x1 and y0 <= y < y1)
+            for y0, y1 in zip(ys, ys[1:])
+            for x0, x1 in zip(xs, xs[1:])
+        ]
+        assert layout.region_counts(columns, rows) == expected
+        assert sum(expected) == len(layout.occupied_cells())
+
+
+def test_buildings_number_scales_with_area():
+    random.seed("TEST-SEED")
+    for i in range(20):
+        number = map_layout.buildings_number(8, 8)
+        assert (
+            constants.BUILDINGS_NUMBER_MIN <= number <= constants.BUILDINGS_NUMBER_MAX
+        )
+        number = map_layout.buildings_number(16, 32)
+        assert (
+            constants.BUILDINGS_NUMBER_MIN * 8
+            <= number
+            <= constants.BUILDINGS_NUMBER_MAX * 8
+        )
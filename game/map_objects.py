@@ -7,6 +7,7 @@ import random
 import arcade
 
 from . import constants
+from . import map_layout
 from .map_object import MapObject
 
 
@@ -20,22 +21,43 @@ class MapObjects:
         One can pass existing list of MapObject instances to MapObjects. By default, objects parameter is equal to None,
         and then the empty list is initialized.
 
+    Attributes:
+    -----------
+    _cells: dict of (int, int): list of MapObject
+        Index of MapObject instances keyed by their cell position, used for O(1) lookups. Lookups return the MapObject
+        that came to the cell first, as the scan of self.objects did. It is kept up to date by add_map_object,
+        remove_map_object and replace_map_object, so self.objects should not be modified directly.
+    version: int
+        Incremented every time MapObject is added or removed, so cached data based on the map (like highlighted tiles
+        in range of player) can be invalidated.
+    width, height: int
+        Dimensions of the owner Grid. MapObjects without owner assume the default grid size from constants.py.
+    listeners: list
+        Objects notified (by map_object_added and map_object_removed methods) when MapObject is added or removed,
+        e.g. Occupancy used by Pathfinder.
+
     Methods:
     --------
     fill_map
         Using Grid width and height values, creates a baseic MapObject for every cell.
 
+    fill_from_layout (MapLayout)
+        Creates MapObject instances for every mountain and building of the MapLayout.
+
     add_buildings
-        Adds buildings to the map.
+        Adds buildings to the map. Map generation uses MapLayout.add_buildings instead.
 
     _has_access_to_empty_tile (MapObject): dict
         Checks if there are other MapObjects on the Tiles adjacent to the MapObject. Returns dict.
 
+    find_map_object_by_cell_position (int, int): MapObject
+        Returns MapObject found at the cell position, or None. Uses the cell index, so it does not scan self.objects.
+
     replace_map_object (MapObject, MapObject)
         Replaces first MapObject with second MapObject.
 
     add_map_object (MapObject)
-        Adds new MapObject to self.objects, and its sprite to arcade SpriteList.
+        Adds new MapObject to self.objects, and its sprite to arcade SpriteList, if SpriteList is already created.
 
     remove_map_object (MapObject)
         Removes a specific MapObject and its sprite from self.object and arcade SpriteList.
@@ -45,34 +67,89 @@ class MapObjects:
 
     def __init__(self, objects=None):
         self.owner = None
-        self.sprite_list = arcade.SpriteList()
+        self._sprite_list = None
         self.objects = objects
         if self.objects is None:
             self.objects = []
+        self.version = 0
+        self.listeners = []
+        self._cells = {}
+        for obj in self.objects:
+            self._cells.setdefault(
+                (obj.cell_position.x, obj.cell_position.y), []
+            ).append(obj)
+
+    @property
+    def width(self):
+        if self.owner is None:
+            return constants.GRID_SIZE_W
+        return self.owner.width
+
+    @property
+    def height(self):
+        if self.owner is None:
+            return constants.GRID_SIZE_H
+        return self.owner.height
+
+    @staticmethod
+    def _make_mountain(x, y):
+        return MapObject(
+            x,
+            y,
+            "image_map_object_mountain_1.png",
+            "image_map_object_mountain_1_selected.png",
+            "image_map_object_mountain_1_targeted.png",
+            successor=None,
+        )
+
+    @staticmethod
+    def _make_building(x, y):
+        """Creates city, that leaves ruins when destroyed."""
+        ruins = MapObject(
+            x,
+            y,
+            "image_map_object_ruins_1.png",
+            "image_map_object_ruins_1_selected.png",
+            "image_map_object_ruins_1_targeted.png",
+            blocks=True,
+            target=False,
+            successor=None,
+        )
+        city = MapObject(
+            x,
+            y,
+            "image_map_object_city_1.png",
+            "image_map_object_city_1_selected.png",
+            "image_map_object_city_1_targeted.png",
+            blocks=True,
+            target=True,
+            successor=ruins,
+        )
+        return city
 
     def fill_map(self):
         """Called at the beginning of map generation, fills the map with mountains."""
         for y in range(self.owner.height):
             for x in range(self.owner.width):
-                map_object = MapObject(
-                    x,
-                    y,
-                    "image_map_object_mountain_1.png",
-                    "image_map_object_mountain_1_selected.png",
-                    "image_map_object_mountain_1_targeted.png",
-                    successor=None,
-                )
-                self.add_map_object(map_object)
+                self.add_map_object(self._make_mountain(x, y))
+
+    def fill_from_layout(self, layout):
+        """
+        Creates MapObject instances for the MapLayout accepted by Grid.generate_map: mountains row by row,
+        then buildings in the order they were placed.
+        """
+        for x, y in layout.occupied_cells():
+            if layout.get(x, y) == map_layout.MOUNTAIN:
+                self.add_map_object(self._make_mountain(x, y))
+        for x, y in layout.buildings:
+            self.add_map_object(self._make_building(x, y))
 
     def add_buildings(self):
         """
         Adds buildings to the map by replacing mountains by buildings. A valid place to spawn a building is
         an existing MapObject that has access to at least one empty Tile.
         """
-        buildings_num = random.randint(
-            constants.BUILDINGS_NUMBER_MIN,
-            constants.BUILDINGS_NUMBER_MAX,
-        )
+        buildings_num = map_layout.buildings_number(self.width, self.height)
         objects_ = copy.copy(self.objects)
         random.shuffle(objects_)
         while buildings_num > 0:
@@ -81,26 +158,7 @@ class MapObjects:
             except IndexError:
                 break
             if self._has_access_to_empty_tile(obj):
-                ruins = MapObject(
-                    obj.cell_position.x,
-                    obj.cell_position.y,
-                    "image_map_object_ruins_1.png",
-                    "image_map_object_ruins_1_selected.png",
-                    "image_map_object_ruins_1_targeted.png",
-                    blocks=True,
-                    target=False,
-                    successor=None,
-                )
-                city = MapObject(
-                    ruins.cell_position.x,
-                    ruins.cell_position.y,
-                    "image_map_object_city_1.png",
-                    "image_map_object_city_1_selected.png",
-                    "image_map_object_city_1_targeted.png",
-                    blocks=True,
-                    target=True,
-                    successor=ruins,
-                )
+                city = self._make_building(obj.cell_position.x, obj.cell_position.y)
                 self.replace_map_object(obj, city)
                 buildings_num -= 1
 
@@ -119,28 +177,20 @@ class MapObjects:
         # Check ends of the map, both horizontally...
         if map_object.cell_position.x == 0:
             del empty_tiles["left"]
-        elif map_object.cell_position.x == constants.GRID_SIZE_W - 1:
+        elif map_object.cell_position.x == self.width - 1:
             del empty_tiles["right"]
         # ...and vertically.
         if map_object.cell_position.y == 0:
             del empty_tiles["below"]
-        elif map_object.cell_position.y == constants.GRID_SIZE_H - 1:
+        elif map_object.cell_position.y == self.height - 1:
             del empty_tiles["above"]
         # Then check for the neighbour objects.
-        for obj in self.objects:
-            if obj is map_object or not obj.blocks:
-                continue
-            if obj.cell_position.x == map_object.cell_position.x:
-                if obj.cell_position.y == map_object.cell_position.y - 1:
-                    del empty_tiles["below"]
-                elif obj.cell_position.y == map_object.cell_position.y + 1:
-                    del empty_tiles["above"]
-            else:
-                if obj.cell_position.y == map_object.cell_position.y:
-                    if obj.cell_position.x == map_object.cell_position.x - 1:
-                        del empty_tiles["left"]
-                    elif obj.cell_position.x == map_object.cell_position.x + 1:
-                        del empty_tiles["right"]
+        for direction, cell in list(empty_tiles.items()):
+            if any(
+                obj is not map_object and obj.blocks
+                for obj in self._cells.get(cell, ())
+            ):
+                del empty_tiles[direction]
         return empty_tiles
 
     def replace_map_object(self, old_map_object, new_map_object):
@@ -149,22 +199,47 @@ class MapObjects:
 
     def add_map_object(self, map_object):
         self.objects.append(map_object)
-        self.sprite_list.append(map_object.sprite.arcade_sprite)
+        self._cells.setdefault(
+            (map_object.cell_position.x, map_object.cell_position.y), []
+        ).append(map_object)
+        self.version += 1
+        for listener in self.listeners:
+            listener.map_object_added(map_object)
+        if self._sprite_list is not None:
+            self._sprite_list.append(map_object.sprite.arcade_sprite)
 
     def remove_map_object(self, map_object):
         self.objects.remove(map_object)
-        self.sprite_list.remove(map_object.sprite.arcade_sprite)
+        cell = (map_object.cell_position.x, map_object.cell_position.y)
+        objects_ = self._cells.get(cell)
+        if objects_ is not None and map_object in objects_:
+            objects_.remove(map_object)
+            if not objects_:
+                del self._cells[cell]
+        self.version += 1
+        for listener in self.listeners:
+            listener.map_object_removed(map_object)
+        if self._sprite_list is not None:
+            self._sprite_list.remove(map_object.sprite.arcade_sprite)
+
+    @property
+    def sprite_list(self):
+        """
+        SpriteList is created on the first use (usually, the first draw), so MapObject instances that are added and
+        removed during map generation never load their textures.
+        """
+        if self._sprite_list is None:
+            self._sprite_list = arcade.SpriteList()
+            for obj in self.objects:
+                self._sprite_list.append(obj.sprite.arcade_sprite)
+        return self._sprite_list
 
     def find_map_object_by_cell_position(self, x, y):
         """Tries to find MapObject instance based on cell position. Returns MapObject or None."""
-        return next(
-            (
-                obj
-                for obj in self.objects
-                if (obj.cell_position.x == x and obj.cell_position.y == y)
-            ),
-            None,
-        )
+        objects_ = self._cells.get((x, y))
+        if objects_:
+            return objects_[0]
+        return None
 
     def find_map_object_by_px_position(self, x, y):
         """
@@ -42,15 +42,13 @@ map_object_below = MapObject(4, 3, "test.png", "test_selected.png", "test_target
 
 
 def test_for_empty_tiles_1():
-    map_objects = MapObjects()
-    map_objects.objects.append(map_object_center)
+    map_objects = MapObjects([map_object_center])
     assert len(map_objects._has_access_to_empty_tile(map_object_center)) == 2
 
 
 def test_for_empty_tiles_2():
     map_object_center.cell_position.x = 4
-    map_objects = MapObjects()
-    map_objects.objects.append(map_object_center)
+    map_objects = MapObjects([map_object_center])
     assert len(map_objects._has_access_to_empty_tile(map_object_center)) == 3
 
 
@@ -80,3 +78,35 @@ def test_for_empty_tiles_4():
         ]
     )
     assert len(map_objects._has_access_to_empty_tile(map_object_center)) == 1
+
+
+def test_find_map_object_by_cell_position():
+    map_objects = MapObjects()
+    map_object_1 = MapObject(1, 2, "test.png", "test_selected.png", "test_targeted.png")
+    map_object_2 = MapObject(1, 2, "test.png", "test_selected.png", "test_targeted.png")
+    map_objects.add_map_object(map_object_1)
+    assert map_objects.find_map_object_by_cell_position(1, 2) is map_object_1
+    map_objects.replace_map_object(map_object_1, map_object_2)
+    assert map_objects.find_map_object_by_cell_position(1, 2) is map_object_2
+    map_objects.remove_map_object(map_object_2)
+    assert map_objects.find_map_object_by_cell_position(1, 2) is None
+
+
+def test_map_objects_on_the_same_cell():
+    blocking = MapObject(2, 2, "test.png", "test_selected.png", "test_targeted.png")
+    passable = MapObject(
+        2, 2, "test.png", "test_selected.png", "test_targeted.png", blocks=False
+    )
+    neighbour = MapObject(1, 2, "test.png", "test_selected.png", "test_targeted.png")
+    map_objects = MapObjects([passable])
+    map_objects.add_map_object(blocking)
+    map_objects.add_map_object(neighbour)
+    assert map_objects.find_map_object_by_cell_position(2, 2) is passable
+    # The blocking MapObject on the cell closes the access, even if it is not the first one there.
+    assert "right" not in map_objects._has_access_to_empty_tile(neighbour)
+    map_objects.remove_map_object(passable)
+    assert map_objects.find_map_object_by_cell_position(2, 2) is blocking
+    assert "right" not in map_objects._has_access_to_empty_tile(neighbour)
+    map_objects.remove_map_object(blocking)
+    assert map_objects.find_map_object_by_cell_position(2, 2) is None
+    assert "right" in map_objects._has_access_to_empty_tile(neighbour)
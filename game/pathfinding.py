@@ -1,146 +1,684 @@
 # -*- coding: utf-8 -*-
 
 
-# Using the Singleton / Borg pattern.
-# Source: https://github.com/faif/python-patterns/blob/master/patterns/creational/borg.py
-# and https://code.activestate.com/recipes/66531/
-# Maybe pathfinding is not the best use case for the Borg pattern, as it will create a lot of instances
-# and it may take a lot of memory.
-# But for the sake of learning, it fits nicely.
-# Still, it leads to the using more memory than necessary, so if I find a better candidate for Borg pattern,
-# I will rewrite pathfinding into Singleton-wanna-be (single file with global state and functions).
+import heapq
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 
+from . import constants
 
-from pathfinding.core.grid import Grid as PathGrid
-from pathfinding.finder.breadth_first import BreadthFirstFinder
 
-from . import constants
+class SearchBuffers:
+    """
+    SearchBuffers are preallocated buffers for searches over the map of the given size, reused by every search
+    instead of allocating new nodes. Cells are referred to by their index in the flat array, y * width + x, where
+    y = 0 is the bottom row, like in the game.
+    Instead of clearing the buffers before the search, every search takes the new generation number, and the cell
+    counts as reached only if its stamp is equal to the current generation - so the reset takes O(1).
+
+    Parameters:
+    -----------
+    width, height: int
+        Dimensions of map, in cells.
+
+    Attributes:
+    -----------
+    neighbours: list of tuples
+        Indices of the adjacent cells of every cell, in the order: up, right, down, left - as seen on the screen.
+    stamps: list of int
+        Generation of the last search that reached the cell.
+    closed: list of int
+        Generation of the last search that expanded the cell; used by a_star_search only.
+    parents: list of int
+        Index of the previous cell on the path, or -1 for the start of the search.
+    distances: list of int
+        Number of steps from the start of the search.
+    queue: list of int
+        Cells in order they were reached by breadth_first_search; only the first `reached` elements are valid.
+    reached: int
+        Number of cells reached by the last breadth_first_search.
+    generation: int
+        Number of the current search.
+
+    Methods:
+    --------
+    next_generation: int
+        Starts the new search.
+    index (tuple): int
+        Returns the index of the (x, y) cell, or -1 if the cell is outside of the map.
+    cell (int): tuple
+        Returns the (x, y) cell of the index.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        size = width * height
+        self.neighbours = []
+        for i in range(size):
+            x = i % width
+            neighbours = []
+            if i + width < size:
+                neighbours.append(i + width)
+            if x < width - 1:
+                neighbours.append(i + 1)
+            if i >= width:
+                neighbours.append(i - width)
+            if x > 0:
+                neighbours.append(i - 1)
+            self.neighbours.append(tuple(neighbours))
+        self.stamps = [0] * size
+        self.closed = [0] * size
+        self.parents = [-1] * size
+        self.distances = [0] * size
+        self.queue = [0] * size
+        self.reached = 0
+        self.generation = 0
+
+    def next_generation(self):
+        self.generation += 1
+        return self.generation
+
+    def index(self, cell):
+        x, y = cell
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return -1
+
+    def cell(self, index):
+        return index % self.width, index // self.width
+
+
+class WorkspacePool:
+    """
+    Thread-safe pool of SearchBuffers for the map of the given size. Every search borrows its own SearchBuffers, so
+    searches may run concurrently, and buffers are reused instead of allocated for every Pathfinder.
+
+    Parameters:
+    -----------
+    width, height: int
+        Dimensions of map, in cells.
+
+    Methods:
+    --------
+    workspace: SearchBuffers
+        Context manager that borrows SearchBuffers from the pool, creating new ones if all are in use.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self._free = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def workspace(self):
+        with self._lock:
+            buffers = self._free.pop() if self._free else None
+        if buffers is None:
+            buffers = SearchBuffers(self.width, self.height)
+        try:
+            yield buffers
+        finally:
+            with self._lock:
+                self._free.append(buffers)
+
+
+class Occupancy:
+    """
+    Occupancy keeps the walkable flags of the map up to date. It subscribes to MapObjects and Beings (see their
+    listeners attribute) and patches only the cells affected when MapObject is added or removed (e.g. replaced by
+    its successor) or Being is added, moved or removed (e.g. after death). Full rebuild is needed only when
+    the occupancy is attached to the new MapObjects (e.g. after the new map is generated) or new Beings.
+    Every Grid has one Occupancy (see Grid.occupancy), shared by all its Pathfinders. Flags are changed only
+    by the game logic, so searches running concurrently just read them.
+
+    Parameters:
+    -----------
+    width, height: int
+        Dimensions of map, in cells.
+
+    Attributes:
+    -----------
+    terrain: bytearray
+        Walkable flags that take into account only blocking MapObject instances, indexed by y * width + x.
+    occupied: bytearray
+        Walkable flags that take into account both blocking MapObject instances and Beings.
+    map_objects: MapObjects
+        Currently tracked MapObjects, or None.
+    beings: Beings
+        Currently tracked Beings, or None.
+    version: int
+        Incremented every time any flag may have changed, so search results can be cached (see PathCache).
+
+    Methods:
+    --------
+    attach_map_objects (MapObjects)
+        Subscribes to MapObjects and rebuilds the flags, unless these MapObjects are already tracked.
+    attach_beings (Beings)
+        Subscribes to Beings and rebuilds the flags, unless these Beings are already tracked.
+    detach
+        Unsubscribes from tracked MapObjects and Beings.
+    map_object_added, map_object_removed (MapObject)
+    being_added, being_removed (Being)
+    being_moved (Being, Position)
+        Called by MapObjects and Beings to patch the cells.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        size = width * height
+        self.terrain = bytearray([1]) * size
+        self.occupied = bytearray([1]) * size
+        # Number of blockers on every cell; there may be more than one, e.g. Being walking through another one.
+        self._object_counts = [0] * size
+        self._being_counts = [0] * size
+        self.map_objects = None
+        self.beings = None
+        self.version = 0
+
+    def attach_map_objects(self, map_objects):
+        if map_objects is self.map_objects:
+            return
+        if self.map_objects is not None:
+            self.map_objects.listeners.remove(self)
+        self.map_objects = map_objects
+        map_objects.listeners.append(self)
+        self._object_counts = [0] * (self.width * self.height)
+        for obj in map_objects.objects:
+            if obj.blocks:
+                self._object_counts[self._index(obj.cell_position)] += 1
+        self._rebuild()
+
+    def attach_beings(self, beings):
+        if beings is self.beings:
+            return
+        if self.beings is not None:
+            self.beings.listeners.remove(self)
+        self.beings = beings
+        beings.listeners.append(self)
+        self._being_counts = [0] * (self.width * self.height)
+        for being in beings.player_beings + beings.enemy_beings:
+            self._being_counts[self._index(being.cell_position)] += 1
+        self._rebuild()
+
+    def detach(self):
+        if self.map_objects is not None:
+            self.map_objects.listeners.remove(self)
+            self.map_objects = None
+        if self.beings is not None:
+            self.beings.listeners.remove(self)
+            self.beings = None
+
+    def map_object_added(self, map_object):
+        if map_object.blocks:
+            self._change(self._object_counts, map_object.cell_position, 1)
+
+    def map_object_removed(self, map_object):
+        if map_object.blocks:
+            self._change(self._object_counts, map_object.cell_position, -1)
+
+    def being_added(self, being):
+        self._change(self._being_counts, being.cell_position, 1)
+
+    def being_removed(self, being):
+        self._change(self._being_counts, being.cell_position, -1)
+
+    def being_moved(self, being, old_position):
+        self._change(self._being_counts, old_position, -1)
+        self._change(self._being_counts, being.cell_position, 1)
+
+    def _index(self, position):
+        return position.y * self.width + position.x
+
+    def _change(self, counts, position, delta):
+        index = self._index(position)
+        counts[index] += delta
+        self._update(index)
+        self.version += 1
+
+    def _update(self, index):
+        walkable = self._object_counts[index] == 0
+        self.terrain[index] = walkable
+        self.occupied[index] = walkable and self._being_counts[index] == 0
+
+    def _rebuild(self):
+        for index in range(self.width * self.height):
+            self._update(index)
+        self.version += 1
+
+
+class PathCache:
+    """
+    PathCache is the thread-safe LRU cache of search results. Keys made by Pathfinder include the Occupancy version,
+    so results are never used after the map or Beings changed; stale entries are just pushed out by the new ones.
+
+    Parameters:
+    -----------
+    size: int
+        Maximal number of remembered results.
+
+    Attributes:
+    -----------
+    hits, misses: int
+        Number of successful and failed lookups.
+
+    Methods:
+    --------
+    get (tuple): object
+        Returns cached value and marks it as recently used, or None if not found.
+    put (tuple, object)
+        Stores the value, removing the least recently used one if the cache is full.
+    clear
+        Removes all results and zeroes the counters.
+    """
+
+    def __init__(self, size=constants.PATH_CACHE_SIZE):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
 
 
-# While running the pathfinding algorithm it might set values on the nodes. Depending on your path finding algorithm
-# things like calculated distances or visited flags might be stored on them. So if you want to run the algorithm
-# in a loop you need to clean the grid first (see Grid.cleanup). Please note that because cleanup looks at all nodes
-# of the grid it might be an operation that can take a bit of time!
 class Pathfinder:
     """
-    Class Pathfinder is a Borg used for finding paths the shortest paths between two points on the map.
-    Will be used by AI, also for rendering the path from PC to cursor on the mouse move, and to check if the newly
+    Pathfinder is used for finding the shortest paths between two points on the map.
+    Is used by AI, also for rendering the path from PC to cursor on the mouse move, and to check if the newly
     generated map is not too convulated.
-    Uses Breadth-First Search algorithm - totally sufficient if diagonal movement is forbidden. Otherwise, A* may
-    be a better choice.
-
-    Unfortunately, there are "gotchas" in the current implementation.
-        1) To rerun the algorithm, calling cleanup method is necessary. Otherwise, the results are unpredictable.
-        2) Finder needs to "step on" the last tile, so it should not be object marked as blocking.
-        3) Finder does not need to "step on" the first tile, so it could be object marked as blocking, but see 4) below.
-        4) Path returned by finder includes both ends, so starting tile is part of the path. In that case, it may be
+    Uses Breadth-First Search algorithm - totally sufficient if diagonal movement is forbidden. A* search is available,
+    too. Searches run over flat array of walkable flags in the game coords, kept up to date by Occupancy of the Grid,
+    so they are rebuilt only when the new map (or new Beings) is used.
+    Every Pathfinder has its own state (last_path, chosen walkable flags and SearchBuffers), so separate instances
+    may be used concurrently, e.g. to evaluate AI of many enemies in parallel, or to simulate several games in one
+    process. Objects that need to share last_path (like Game and SpriteTracker) should share the instance.
+
+    Gotchas:
+        1) Finder needs to "step on" the last tile, so it should not be object marked as blocking.
+        2) Finder does not need to "step on" the first tile, so it could be object marked as blocking, but see 3) below.
+        3) Path returned by finder includes both ends, so starting tile is part of the path. In that case, it may be
            necessary to use the "target" object (like building) as the start tile, and then follow the path in reverse.
 
     Parameters:
     ===========
     grid: Grid
-        Already existing instance of Grid. Used to create matrix required by pathfinding package.
+        Already existing instance of Grid. Provides the walkable flags, through Grid.occupancy.
+    pool: WorkspacePool
+        If passed, SearchBuffers are borrowed from the pool for every search, so short-living Pathfinders do not need
+        to allocate their own. Otherwise, Pathfinder creates its own SearchBuffers.
+    cache: PathCache
+        Results of find_path and distance_field, keyed by the endpoints, chosen walkable flags and Occupancy version.
+        Short-living Pathfinders may share one PathCache (like Grid.path_cache); otherwise, new one is created.
 
     Methods:
     ========
-    make_matrix (Grid):
-        Uses Grid to create matrix required by pathfinding package.
-    set_up_path_grid:
-        Recalculates the matrix and creates new PathGrid.
-    clean_up_path_grid: None or PathGrid
-        Creates new PathGrid instance or cleans up existing PathGrid instance.
-    _fix_path (list of tuples): list of tuples
-        Called once in find_path method, to fix the inverted y axis. TODO: Hacky solution; improve.
-    find_path (Position, Position): list of tuples, int
+    set_up_path_grid (Beings):
+        Chooses walkable flags that take Beings into account (or not, if None is passed).
+    find_path (Position, Position, function): list of tuples, int
         Finds path between first Position and second Position.
+    distance_field (Position): dict, dict
+        Runs single flood fill from Position, returns distances and predecessors of every reachable cell.
+    reconstruct_path (dict, tuple): list of tuples
+        Uses predecessors returned by distance_field to rebuild path from the start of flood fill to the cell.
+    eccentricity (tuple, iterable of tuples): int
+        Returns the longest of the shortest paths from the cell to the other cells, measured in tiles.
+    find_longest_path (iterable of tuples): int
+        Returns the longest of the shortest paths between any two cells (diameter of the map), measured in tiles.
     """
 
-    _shared_state = {}
-
-    def __init__(self, grid):
-        self.__dict__ = self._shared_state
+    def __init__(self, grid, pool=None, cache=None):
         self.grid = grid
-        self._matrix = []
-        self.make_matrix(None)
-        self._path_grid = PathGrid(matrix=self._matrix)
-        self.finder = BreadthFirstFinder()
+        self.pool = pool
+        self.cache = cache
+        if self.cache is None:
+            self.cache = PathCache()
+        self._buffers = None
+        if pool is None:
+            self._buffers = SearchBuffers(grid.width, grid.height)
+        self._walkable = grid.occupancy.terrain
         self.last_path = ()
 
-    def make_matrix(self, beings):
+    @contextmanager
+    def _workspace(self):
+        """Yields SearchBuffers for a single search: borrowed from the pool, or owned by this Pathfinder."""
+        if self.pool is None:
+            yield self._buffers
+        else:
+            with self.pool.workspace() as buffers:
+                yield buffers
+
+    def _cache_key(self, *args):
+        """Key of the search result: kind of search and its arguments, walkable flags used, and their version."""
+        occupancy = self.grid.occupancy
+        return args + (self._walkable is occupancy.occupied, occupancy.version)
+
+    def set_up_path_grid(self, beings):
         """
-        Uses Grid to create matrix required by pathfinding package. '0' means empty tile, '1' indicates obstacle.
-        It may be called with 'None' beings (e.g. when checking for connection between map tiles only) or with
-        the actual instance of Beings (e.g. when looking for path from player to target).
+        Chooses walkable flags used by the searches. If Beings are passed, cells occupied by Beings are not walkable.
+        Flags are patched by Occupancy when MapObjects or Beings change, so it is cheap to call it before every
+        search; the full rebuild happens only if the Grid got the new MapObjects, or new Beings are passed.
         """
-        self._matrix = [
-            [1 for x in range(self.grid.width)] for y in range(self.grid.height)
-        ]
-        for obj in self.grid.map_objects.objects:
-            if obj.blocks:
-                self._matrix[obj.cell_position.y][obj.cell_position.x] = 0
-        if beings:
-            for player in beings.player_beings:
-                self._matrix[player.cell_position.y][player.cell_position.x] = 0
-            for enemy in beings.enemy_beings:
-                self._matrix[enemy.cell_position.y][enemy.cell_position.x] = 0
-        # Arcade grid starts at the bottom-left corner. Reversing matrix ensures compatibility.
-        self._matrix.reverse()
+        occupancy = self.grid.occupancy
+        if beings is None:
+            self._walkable = occupancy.terrain
+        else:
+            occupancy.attach_beings(beings)
+            self._walkable = occupancy.occupied
 
-    def set_up_path_grid(self, beings):
+    def find_path(self, start_position, target_position, search=None):
         """
-        Recalculates the matrix and creates new PathGrid. It is used when the data, from which matrix is created, may
-        change frequently, e.g. to take into account movable entities.
+        Finds shortest path between two positions. Returns path (list of tuples, every tuple is a coordinate of the step
+        taken, both ends included) and number of cells expanded by the search. Uses breadth_first_search by default;
+        a_star_search may be passed instead. Results are cached, but every call returns the new list.
         """
-        self.make_matrix(beings)
-        self._path_grid = PathGrid(matrix=self._matrix)
+        search = search or breadth_first_search
+        start = (start_position.x, start_position.y)
+        target = (target_position.x, target_position.y)
+        key = self._cache_key("path", start, target, search)
+        cached = self.cache.get(key)
+        if cached is None:
+            with self._workspace() as buffers:
+                cached = find_path(buffers, self._walkable, start, target, search)
+            self.cache.put(key, cached)
+        path, expanded = cached
+        path = list(path)
+        self.last_path = path
+        return path, expanded
 
-    def clean_up_path_grid(self):
+    def distance_field(self, start_position):
         """
-        Creates new PathGrid if not exists, performs cleanup otherwise.
-        It is used if pathfinder is used in the loop, e.g. when checking for the longest possible path during the
-        map generation.
+        Runs breadth-first flood fill from start_position over the current walkable flags, so set_up_path_grid should
+        be called beforehand. Returns two dicts keyed by (x, y) cell coords: number of steps from the start, and the
+        previous cell on the shortest path (None for the start itself). See flood_fill.
+        Results are cached, so returned dicts must not be modified.
         """
-        try:
-            self._path_grid.cleanup()
-        except AttributeError:
-            self._path_grid = PathGrid(matrix=self._matrix)
+        start = (start_position.x, start_position.y)
+        key = self._cache_key("distance field", start)
+        cached = self.cache.get(key)
+        if cached is None:
+            with self._workspace() as buffers:
+                cached = flood_fill(
+                    self.grid.width, self.grid.height, self._walkable, start, buffers
+                )
+            self.cache.put(key, cached)
+        return cached
 
     @staticmethod
-    def _fix_path(path):
-        """Takes path returned by (path)finder and fixes the inverted y coordinates, then returns new path."""
-        pairs = [(0, 7), (1, 6), (2, 5), (3, 4), (4, 3), (5, 2), (6, 1), (7, 0)]
-        new_path = []
-        for coords in path:
-            for pair in pairs:
-                if coords[1] == pair[0]:
-                    new_path.append(
-                        (
-                            coords[0],
-                            pair[1],
-                        )
-                    )
-        return new_path
-
-    def find_path(self, start_position, target_position):
+    def reconstruct_path(predecessors, cell):
         """
-        Finds shortest path between two positions. Returns path (list of sets, every set is a coordinate of the step
-        taken) and number of passes.
-        Hacky position.y is result of how coords of arcade and pathfinding library work: arcade starts
-        from the bottom-left corner, and pathfinding starts from the top-left corner.
+        Follows predecessors returned by distance_field back from the cell. Returns path that includes both ends,
+        just like find_path, or empty list if the cell is not reachable.
         """
-        start = self._path_grid.node(
-            start_position.x, self.grid.width - 1 - start_position.y
-        )
-        try:
-            target = self._path_grid.node(
-                target_position.x, self.grid.height - 1 - target_position.y
+        if cell not in predecessors:
+            return []
+        path = []
+        while cell is not None:
+            path.append(cell)
+            cell = predecessors[cell]
+        path.reverse()
+        return path
+
+    def eccentricity(self, cell, cells=None):
+        """
+        Returns the length (in tiles, both ends included, like len(path)) of the longest shortest path from the cell
+        to any reachable cell. See eccentricity function.
+        """
+        with self._workspace() as buffers:
+            return eccentricity(
+                self.grid.width,
+                self.grid.height,
+                self._walkable,
+                cell,
+                cells,
+                buffers,
             )
-        except IndexError:
-            return [], 0
-        else:
-            path, runs = self.finder.find_path(
-                start=start, end=target, grid=self._path_grid
+
+    def find_longest_path(self, cells):
+        """
+        Finds the longest of the shortest paths between any two of the cells on the current walkable flags.
+        See find_longest_path function.
+        """
+        with self._workspace() as buffers:
+            return find_longest_path(
+                self.grid.width, self.grid.height, self._walkable, cells, buffers
             )
-            path = self._fix_path(path)
-            self.last_path = path
-            return path, runs
+
+
+# Functions below work on the flat sequence of walkable flags, indexed by y * width + x, where y = 0 is the bottom
+# row, like in the game. They are shared by Pathfinder and MapLayout, that validates maps before MapObject instances
+# are created. Like in find_path, starting cell may be blocked.
+
+
+def breadth_first_search(buffers, walkable, start, goal=-1):
+    """
+    Runs breadth-first search from the start index, and stops when the goal index is expanded (if goal is passed).
+    Neighbours are visited up, right, down, left - the same order as in BreadthFirstFinder of the pathfinding package
+    used before, so the paths did not change. Results are left in the buffers. Returns number of expanded cells.
+    """
+    generation = buffers.next_generation()
+    stamps = buffers.stamps
+    parents = buffers.parents
+    distances = buffers.distances
+    queue = buffers.queue
+    neighbours = buffers.neighbours
+    stamps[start] = generation
+    parents[start] = -1
+    distances[start] = 0
+    queue[0] = start
+    head = 0
+    tail = 1
+    while head < tail:
+        current = queue[head]
+        head += 1
+        if current == goal:
+            break
+        distance = distances[current] + 1
+        for neighbour in neighbours[current]:
+            if stamps[neighbour] == generation or not walkable[neighbour]:
+                continue
+            stamps[neighbour] = generation
+            parents[neighbour] = current
+            distances[neighbour] = distance
+            queue[tail] = neighbour
+            tail += 1
+    buffers.reached = tail
+    return head
+
+
+def a_star_search(buffers, walkable, start, goal):
+    """
+    Runs A* search from the start index to the goal index, using Manhattan distance as the heuristic. Expands fewer
+    cells than breadth_first_search when the goal is known; the path found has the same length, but may take
+    a different route. Results are left in the buffers. Returns number of expanded cells.
+    """
+    generation = buffers.next_generation()
+    stamps = buffers.stamps
+    closed = buffers.closed
+    parents = buffers.parents
+    distances = buffers.distances
+    neighbours = buffers.neighbours
+    width = buffers.width
+    goal_x, goal_y = buffers.cell(goal)
+    stamps[start] = generation
+    parents[start] = -1
+    distances[start] = 0
+    # Counter keeps the heap stable, so ties are expanded in the order they were found.
+    counter = 0
+    heap = [(0, counter, start)]
+    expanded = 0
+    while heap:
+        _, _, current = heapq.heappop(heap)
+        if closed[current] == generation:
+            continue
+        closed[current] = generation
+        expanded += 1
+        if current == goal:
+            break
+        distance = distances[current] + 1
+        for neighbour in neighbours[current]:
+            if not walkable[neighbour] or closed[neighbour] == generation:
+                continue
+            if stamps[neighbour] == generation and distances[neighbour] <= distance:
+                continue
+            stamps[neighbour] = generation
+            parents[neighbour] = current
+            distances[neighbour] = distance
+            estimate = abs(neighbour % width - goal_x) + abs(
+                neighbour // width - goal_y
+            )
+            counter += 1
+            heapq.heappush(heap, (distance + estimate, counter, neighbour))
+    return expanded
+
+
+def trace_path(buffers, goal):
+    """Follows the parents left by the last search back from the goal index. Returns list of (x, y) cells."""
+    if goal < 0 or buffers.stamps[goal] != buffers.generation:
+        return []
+    path = []
+    while goal != -1:
+        path.append(buffers.cell(goal))
+        goal = buffers.parents[goal]
+    path.reverse()
+    return path
+
+
+def find_path(buffers, walkable, start, goal, search=breadth_first_search):
+    """
+    Finds the shortest path from the start cell to the goal cell, both given as (x, y) tuples. Returns path that
+    includes both ends, in the game coords, and number of expanded cells. Returns empty path if the goal is outside
+    of the map, blocked, or not reachable.
+    """
+    start_index = buffers.index(start)
+    goal_index = buffers.index(goal)
+    if start_index < 0 or goal_index < 0:
+        return [], 0
+    if goal_index != start_index and not walkable[goal_index]:
+        return [], 0
+    expanded = search(buffers, walkable, start_index, goal_index)
+    return trace_path(buffers, goal_index), expanded
+
+
+def flood_fill(width, height, walkable, start, buffers=None):
+    """
+    Runs breadth-first flood fill from the start cell. Returns two dicts keyed by (x, y) cell coords: number of steps
+    from the start, and the previous cell on the shortest path (None for the start itself), in the order cells were
+    reached. Paths rebuilt by Pathfinder.reconstruct_path are the same as paths returned by Pathfinder.find_path.
+    """
+    if buffers is None:
+        buffers = SearchBuffers(width, height)
+    breadth_first_search(buffers, walkable, buffers.index(start))
+    distances = {}
+    predecessors = {}
+    for index in buffers.queue[: buffers.reached]:
+        cell = buffers.cell(index)
+        parent = buffers.parents[index]
+        distances[cell] = buffers.distances[index]
+        predecessors[cell] = buffers.cell(parent) if parent != -1 else None
+    return distances, predecessors
+
+
+def eccentricity(width, height, walkable, cell, cells=None, buffers=None):
+    """
+    Runs breadth-first search from the cell and returns the length (in tiles, both ends included, like len(path))
+    of the longest shortest path to any reachable cell. If cells are passed, only these are taken into account
+    as the ends of the path. Unreachable cells are ignored. Returns 0 if no other cell is reachable.
+    """
+    if buffers is None:
+        buffers = SearchBuffers(width, height)
+    indices = None
+    if cells is not None:
+        indices = [buffers.index(other) for other in cells]
+        indices = [index for index in indices if index >= 0]
+    return _eccentricity(buffers, walkable, buffers.index(cell), indices)
+
+
+def _eccentricity(buffers, walkable, start, indices):
+    breadth_first_search(buffers, walkable, start)
+    if indices is None:
+        # Cells are reached in order of their distance, so the last one is the farthest.
+        longest = buffers.distances[buffers.queue[buffers.reached - 1]]
+    else:
+        generation = buffers.generation
+        stamps = buffers.stamps
+        distances = buffers.distances
+        longest = 0
+        for index in indices:
+            if stamps[index] == generation and distances[index] > longest:
+                longest = distances[index]
+    return longest + 1 if longest else 0
+
+
+def find_longest_path(width, height, walkable, cells, buffers=None):
+    """
+    Finds the longest of the shortest paths between any two of the cells, which is used to discard the maps
+    that are too convoluted. Runs one breadth-first search per cell instead of one per pair of cells, so it takes
+    O(V*E) instead of O(V^2*E). All searches share the same SearchBuffers.
+    """
+    if buffers is None:
+        buffers = SearchBuffers(width, height)
+    indices = sorted(set(buffers.index(cell) for cell in cells))
+    longest = 0
+    for index in indices:
+        length = _eccentricity(buffers, walkable, index, indices)
+        if length > longest:
+            longest = length
+    return longest
+
+
+def estimate_longest_path(width, height, walkable, samples=4, buffers=None):
+    """
+    Estimates the longest of the shortest paths between any two walkable cells in O(samples * V), for maps that are
+    too large for find_longest_path. In every connected area, searches are started from a few cells spread over
+    the area, and each is followed by the search from the farthest cell found (the double sweep). The result never
+    exceeds the exact length, and on the generated maps it is usually equal to it.
+    """
+    if buffers is None:
+        buffers = SearchBuffers(width, height)
+    seen = bytearray(width * height)
+    longest = 0
+    for index, flag in enumerate(walkable):
+        if not flag or seen[index]:
+            continue
+        breadth_first_search(buffers, walkable, index)
+        area = buffers.queue[: buffers.reached]
+        for reached in area:
+            seen[reached] = 1
+        starts = area[:: max(1, len(area) // samples)][:samples]
+        for start in starts:
+            breadth_first_search(buffers, walkable, start)
+            farthest = buffers.queue[buffers.reached - 1]
+            breadth_first_search(buffers, walkable, farthest)
+            # Cells are reached in order of their distance, so the last one is the farthest.
+            length = buffers.distances[buffers.queue[buffers.reached - 1]] + 1
+            if length > longest:
+                longest = length
+    return longest if longest > 1 else 0
@@ -1,11 +1,24 @@
 # -*- coding: utf-8 -*-
 
 
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from game import being
+from game.beings import Beings
 from game.components.position import Position
+from game.generation_stats import GenerationStats
 from game.grid import Grid
 from game.map_object import MapObject
 from game.map_objects import MapObjects
-from game.pathfinding import Pathfinder
+from game.pathfinding import (
+    Occupancy,
+    PathCache,
+    Pathfinder,
+    a_star_search,
+    estimate_longest_path,
+    find_longest_path,
+)
 
 
 def test_moving_around_the_obstacle():
@@ -19,10 +32,188 @@ def test_moving_around_the_obstacle():
     position_2 = Position(3, 2)
     pathfinder = Pathfinder(grid)
     path_1, _ = pathfinder.find_path(position_1, position_2)
-    print(pathfinder._path_grid.grid_str(path=path_1, start=position_1, end=position_2))
     position_3 = Position(0, 2)
     position_4 = Position(4, 2)
-    pathfinder.clean_up_path_grid()
     path_2, _ = pathfinder.find_path(position_3, position_4)
-    print(pathfinder._path_grid.grid_str(path=path_2, start=position_3, end=position_4))
     assert len(path_1) == 5 and len(path_2) == 7
+
+
+def test_distance_field_matches_find_path():
+    map_objects = MapObjects()
+    map_object = MapObject(
+        2, 2, "test.png", "test_selected.png", "test_targeted.png", blocks=True
+    )
+    map_objects.add_map_object(map_object)
+    grid = Grid(width=8, height=8, map_objects=map_objects)
+    pathfinder = Pathfinder(grid)
+    pathfinder.set_up_path_grid(None)
+    start = Position(1, 2)
+    distances, predecessors = pathfinder.distance_field(start)
+    assert (2, 2) not in distances
+    assert distances[(1, 2)] == 0 and distances[(3, 2)] == 4
+    for tile in grid.tiles:
+        path, _ = pathfinder.find_path(start, tile.cell_position)
+        cell = (tile.cell_position.x, tile.cell_position.y)
+        assert pathfinder.reconstruct_path(predecessors, cell) == path
+
+
+def test_find_longest_path():
+    map_objects = MapObjects()
+    for y in range(4):
+        map_object = MapObject(
+            2, y, "test.png", "test_selected.png", "test_targeted.png", blocks=True
+        )
+        map_objects.add_map_object(map_object)
+    grid = Grid(width=5, height=5, map_objects=map_objects)
+    pathfinder = Pathfinder(grid)
+    pathfinder.set_up_path_grid(None)
+    cells = [
+        (tile.cell_position.x, tile.cell_position.y)
+        for tile in grid.tiles
+        if tile.cell_position.x != 2 or tile.cell_position.y == 4
+    ]
+    # From (0, 0) to (4, 0) around the wall: 4 steps up, 4 steps right, 4 steps down.
+    assert pathfinder.eccentricity((0, 0), cells) == 13
+    assert pathfinder.find_longest_path(cells) == 13
+
+
+def test_find_path_on_non_square_grid():
+    map_objects = MapObjects()
+    for y in range(5):
+        map_object = MapObject(
+            6, y, "test.png", "test_selected.png", "test_targeted.png", blocks=True
+        )
+        map_objects.add_map_object(map_object)
+    grid = Grid(width=12, height=6, map_objects=map_objects)
+    pathfinder = Pathfinder(grid)
+    pathfinder.set_up_path_grid(None)
+    start = Position(1, 1)
+    _, predecessors = pathfinder.distance_field(start)
+    for tile in grid.tiles:
+        path, _ = pathfinder.find_path(start, tile.cell_position)
+        cell = (tile.cell_position.x, tile.cell_position.y)
+        assert pathfinder.reconstruct_path(predecessors, cell) == path
+    path, _ = pathfinder.find_path(start, Position(10, 1))
+    # Around the wall: 4 steps up, 9 steps right, 4 steps down, both ends included.
+    assert (6, 5) in path and len(path) == 18
+
+
+def test_a_star_matches_breadth_first_length():
+    map_objects = MapObjects()
+    for x in range(1, 8):
+        map_object = MapObject(
+            x, 3, "test.png", "test_selected.png", "test_targeted.png", blocks=True
+        )
+        map_objects.add_map_object(map_object)
+    grid = Grid(width=8, height=8, map_objects=map_objects)
+    pathfinder = Pathfinder(grid)
+    pathfinder.set_up_path_grid(None)
+    start = Position(6, 0)
+    for tile in grid.tiles:
+        path, _ = pathfinder.find_path(start, tile.cell_position)
+        a_star_path, _ = pathfinder.find_path(start, tile.cell_position, a_star_search)
+        assert len(a_star_path) == len(path)
+        if path:
+            assert a_star_path[0] == path[0] and a_star_path[-1] == path[-1]
+    path, _ = pathfinder.find_path(start, Position(6, 7))
+    # Through the gap at (0, 3): 6 steps left, 7 steps up, 6 steps right, both ends included.
+    assert (0, 3) in path and len(path) == 20
+    assert pathfinder.find_path(start, Position(3, 3)) == ([], 0)
+    assert pathfinder.find_path(start, Position(8, 0)) == ([], 0)
+
+
+def test_occupancy_patches_cells():
+    map_objects = MapObjects()
+    mountain = MapObject(
+        2, 2, "test.png", "test_selected.png", "test_targeted.png", blocks=True
+    )
+    map_objects.add_map_object(mountain)
+    grid = Grid(width=5, height=5, map_objects=map_objects)
+    player = being.construct_beings(being.Player, 0, 0)
+    beings = Beings([player])
+    pathfinder = Pathfinder(grid)
+    pathfinder.set_up_path_grid(beings)
+    occupancy = grid.occupancy
+    player.move_to(1, 0)
+    beings.add_enemy_being(being.construct_beings(being.Enemy, 4, 4))
+    map_objects.replace_map_object(
+        mountain,
+        MapObject(
+            3, 3, "test.png", "test_selected.png", "test_targeted.png", blocks=False
+        ),
+    )
+    # Flags patched cell by cell are the same as flags built from scratch.
+    expected = bytearray([1]) * 25
+    expected[1] = expected[24] = 0
+    assert occupancy.terrain == bytearray([1]) * 25
+    assert occupancy.occupied == expected
+    rebuilt = Occupancy(5, 5)
+    rebuilt.attach_map_objects(map_objects)
+    rebuilt.attach_beings(beings)
+    assert rebuilt.occupied == expected
+    pathfinder.set_up_path_grid(beings)
+    assert grid.occupancy is occupancy
+    path, _ = pathfinder.find_path(Position(0, 0), Position(2, 2))
+    assert len(path) == 5
+
+
+def test_pathfinders_are_independent():
+    grid = Grid(width=8, height=8, map_objects=MapObjects())
+    pathfinder_1 = Pathfinder(grid)
+    pathfinder_2 = Pathfinder(grid, grid.workspace_pool)
+    pathfinder_1.find_path(Position(0, 0), Position(2, 0))
+    pathfinder_2.find_path(Position(0, 0), Position(0, 1))
+    assert pathfinder_1.last_path == [(0, 0), (1, 0), (2, 0)]
+    assert pathfinder_2.last_path == [(0, 0), (0, 1)]
+
+
+def test_concurrent_searches_share_workspace_pool():
+    grid = Grid(width=8, height=8, map_objects=MapObjects())
+    starts = [Position(x, y) for x in range(8) for y in range(8)]
+    expected = [Pathfinder(grid).distance_field(start)[0] for start in starts]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(
+            executor.map(
+                lambda start: Pathfinder(grid, grid.workspace_pool).distance_field(
+                    start
+                )[0],
+                starts,
+            )
+        )
+    assert results == expected
+
+
+def test_path_cache():
+    grid = Grid(width=8, height=8, map_objects=MapObjects())
+    player = being.construct_beings(being.Player, 3, 0)
+    beings = Beings([player])
+    pathfinder = Pathfinder(grid, cache=PathCache(size=2))
+    pathfinder.set_up_path_grid(beings)
+    path, _ = pathfinder.find_path(Position(0, 0), Position(5, 0))
+    path.pop()
+    cached_path, _ = pathfinder.find_path(Position(0, 0), Position(5, 0))
+    assert pathfinder.cache.hits == 1 and pathfinder.cache.misses == 1
+    assert len(cached_path) == 8
+    # Moving Being changes the occupancy version, so the path is searched again.
+    player.move_to(3, 1)
+    path, _ = pathfinder.find_path(Position(0, 0), Position(5, 0))
+    assert pathfinder.cache.misses == 2 and len(path) == 6
+    distances, _ = pathfinder.distance_field(Position(0, 0))
+    assert pathfinder.distance_field(Position(0, 0))[0] is distances
+    assert len(pathfinder.cache) == 2
+    pathfinder.set_up_path_grid(None)
+    pathfinder.find_path(Position(0, 0), Position(5, 0))
+    assert pathfinder.cache.misses == 4
+
+
+def test_estimate_longest_path():
+    for seed in range(20):
+        random.seed(seed)
+        layout = Grid._make_candidate(16, 12, GenerationStats())
+        walkable = layout.walkable()
+        exact = find_longest_path(16, 12, walkable, layout.empty_cells())
+        estimated = estimate_longest_path(16, 12, walkable)
+        assert estimated <= exact
+        assert estimated >= exact * 0.9
+    # Single empty cell has no path to any other cell, just like in find_longest_path.
+    assert estimate_longest_path(3, 1, bytearray([0, 1, 0])) == 0
@@ -5,12 +5,14 @@ import random
 import string
 
 
-def make_seed(n, sections):
+def make_seed(n, sections, rng=random):
+    """
+    Returns seed made of `sections` random alphanumeric sections of length `n`, separated with dashes.
+    By default uses the global random module; pass a random.Random instance to draw from a separate stream.
+    """
     seed = ""
     while sections > 0:
-        seed = seed + "".join(
-            random.choices(string.ascii_uppercase + string.digits, k=n)
-        )
+        seed = seed + "".join(rng.choices(string.ascii_uppercase + string.digits, k=n))
         seed = seed + "-"
         sections -= 1
     return seed[:-1]
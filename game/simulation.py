@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+
+
+from concurrent.futures import ProcessPoolExecutor
+
+from . import constants
+from .ai import plan_enemies
+from .exceptions import InvalidGameState
+from .states import State
+from .turn_context import TurnContext
+
+
+class Simulation:
+    """
+    Simulation is the headless core of the game. It owns Grid, Beings and the game state, and advances the turns:
+    map generation, animated player movement, enemy attacks and enemy movement. It does not know anything about
+    arcade.Window, input or rendering, so it can be stepped without opening a window, e.g. to run AI-vs-AI matches.
+    Game is a thin renderer and input handler over the Simulation instance.
+
+    Parameters:
+    -----------
+    grid: Grid
+        Game map.
+    beings: Beings
+        All player and enemy Beings. Simulation becomes the owner of Beings, as spawning Beings needs access to grid.
+    state: State
+        Initial state of the game. Defaults to State.GENERATE_MAP.
+    seed: str
+        Game seed. Used to find the pre-generated map in the map_cache.
+    map_cache: MapCache
+        Pre-generated maps. If None, the map is always generated.
+    planning_workers: int
+        If greater than 1, all enemies are planned at once, in worker processes, when the enemy phase starts
+        (see ai.plan_enemies). Otherwise every enemy is planned when it becomes active. The worker processes are
+        started on the first use and live until close is called.
+
+    Attributes:
+    -----------
+    active_player: Being
+        Currently selected player Being, or None.
+    active_enemy: Being
+        Enemy Being that is currently moving or attacking, or None.
+    player_path: list of tuples
+        Remaining steps of the active player movement, consumed one per step during PLAYER_MOVE_ANIMATION.
+    turn_context: TurnContext
+        World snapshot shared by all enemy AIs, built when ENEMY_ATTACK or ENEMY_TURN starts and closed when
+        it ends; None otherwise.
+
+    Methods:
+    --------
+    generate_map
+        Generates new map, spawns player and enemy Beings, then waits for the player.
+    move_active_player (list of tuples)
+        Starts the movement of the active player along the path.
+    end_player_turn
+        Passes the turn to the enemies, that attack first, then move.
+    step
+        Advances the simulation by one tick; Game calls it once per on_update.
+    run_enemy_turn (int): int
+        Steps the simulation until the enemy turn is finished. Returns number of steps taken.
+    close
+        Shuts down the worker processes used for enemy planning.
+    """
+
+    def __init__(
+        self,
+        grid,
+        beings,
+        state=State.GENERATE_MAP,
+        seed=None,
+        map_cache=None,
+        planning_workers=constants.AI_PLANNING_WORKERS,
+    ):
+        self.grid = grid
+        self.beings = beings
+        self.beings.owner = self
+        self.state = state
+        self.seed = seed
+        self.map_cache = map_cache
+        self.planning_workers = planning_workers
+        self._planning_executor = None
+        self.active_player = None
+        self.active_enemy = None
+        self.player_path = []
+        self.turn_context = None
+
+    def generate_map(self):
+        """Generates map, spawns all Beings, then waits for any key to start the first enemy turn."""
+        self._close_turn_context()
+        self.grid.generate_map(seed=self.seed, map_cache=self.map_cache)
+        self.state = State.PRESS_ANY_KEY
+        for i in range(constants.PLAYER_BEINGS_NO):
+            self.beings.spawn_player_being()
+        for i in range(constants.ENEMY_BEINGS_INITIAL_NO):
+            self.beings.spawn_enemy_being()
+
+    def move_active_player(self, path):
+        """Active player will move one tile per step along the path. Path includes the starting tile."""
+        self.player_path = list(path)
+        self.state = State.PLAYER_MOVE_ANIMATION
+
+    def end_player_turn(self):
+        self.state = State.ENEMY_ATTACK
+
+    def step(self):
+        if self.state == State.GENERATE_MAP:
+            self.generate_map()
+        self.active_player = self.beings.find_active_player()
+        if self.active_player is None:
+            if self.state not in [
+                State.ENEMY_TURN,
+                State.ENEMY_ATTACK,
+                State.PRESS_ANY_KEY,
+            ]:
+                self.state = State.PLAY
+        # Remove dead enemies before checking for enemy turn
+        # allows to apply environmental effect before the enemy can act.
+        # It also removes dead enemies from tile overlays.
+        self._remove_dead_beings()
+        if self.state == State.PLAYER_MOVE_ANIMATION:
+            self._step_player_move()
+        if self.state == State.ENEMY_TURN:
+            self._step_enemy_turn()
+        if self.state == State.ENEMY_ATTACK:
+            self._step_enemy_attack()
+
+    def run_enemy_turn(self, max_steps=10000):
+        """
+        Used when running without a window. Starts the enemy turn if the game waits for the player, then steps
+        until the player gets the control back.
+        """
+        if self.state == State.PRESS_ANY_KEY:
+            self.state = State.ENEMY_TURN
+        elif self.state == State.PLAY:
+            self.end_player_turn()
+        steps = 0
+        while self.state in [State.ENEMY_TURN, State.ENEMY_ATTACK]:
+            if steps >= max_steps:
+                raise InvalidGameState(
+                    f"Enemy turn did not finish in {max_steps} steps."
+                )
+            self.step()
+            steps += 1
+        return steps
+
+    def close(self):
+        self._close_turn_context()
+        if self._planning_executor is not None:
+            self._planning_executor.shutdown()
+            self._planning_executor = None
+
+    def _remove_dead_beings(self):
+        for enemy in list(self.beings.enemy_beings):
+            if enemy.hp <= 0:
+                self.beings.remove_enemy_being(enemy)
+                # TODO: it should be done after every move performed by Being, too!
+                for tile in self.grid.tiles:
+                    try:
+                        tile.remove_overlay(enemy)
+                    except ValueError:  # enemy not in list
+                        pass
+        for player in list(self.beings.player_beings):
+            if player.hp <= 0:
+                self.beings.remove_player_being(player)
+
+    def _open_turn_context(self):
+        if self.turn_context is None:
+            self.turn_context = TurnContext(self.grid, self.beings)
+            if self.planning_workers > 1:
+                unplanned = [
+                    enemy
+                    for enemy in self.beings.enemy_beings
+                    if not enemy.ai.map_in_range and not enemy.ai.map_out_range
+                ]
+                if unplanned:
+                    if self._planning_executor is None:
+                        self._planning_executor = ProcessPoolExecutor(
+                            max_workers=self.planning_workers
+                        )
+                    plan_enemies(
+                        unplanned,
+                        self.grid,
+                        self.turn_context,
+                        self._planning_executor,
+                        self.planning_workers,
+                    )
+        return self.turn_context
+
+    def _close_turn_context(self):
+        if self.turn_context is not None:
+            self.turn_context.close()
+            self.turn_context = None
+
+    def _step_player_move(self):
+        """Show player movements"""
+        try:
+            coords = self.player_path.pop(0)
+            self.active_player.move_to(coords[0], coords[1])
+        except IndexError:
+            self.active_player.moved = True
+            self.state = State.TARGET
+
+    def _step_enemy_turn(self):
+        # Search for the enemy that did not move this turn yet, and make him active.
+        if not self.active_enemy:
+            for enemy in self.beings.enemy_beings:
+                if not enemy.moved:
+                    self.active_enemy = enemy
+        # If there is a valid enemy, then find the best path and move towards this path.
+        if self.active_enemy:
+            context = self._open_turn_context()
+            # Gather map info if enemy did not do this yes (ie, if it's his first move this turn).
+            if (
+                not self.active_enemy.ai.map_in_range
+                and not self.active_enemy.ai.map_out_range
+            ):
+                self.active_enemy.ai.gather_map_info(self.grid, self.beings, context)
+            # TODO: That's a bit redudant, decide method should not be called every step.
+            decision = self.active_enemy.ai.decide(self.beings, self.grid)
+            path = decision.path
+            if path:
+                tile = path.pop(0)
+                self.active_enemy.move_to(tile[0], tile[1])
+            else:
+                # If path is empty, then end the movement phase for this enemy.
+                self.active_enemy.moved = True
+                # If there are valid target positions, then show the overlay over them.
+                affected_pos = decision.best_affected
+                if affected_pos:
+                    for pos in affected_pos:
+                        tile = self.grid.tile_at(pos[0], pos[1])
+                        tile.add_overlay(self.active_enemy)
+                self.active_enemy = None
+        # If no valid candidate for active_enemy found, end the enemy turn.
+        else:
+            for enemy in self.beings.enemy_beings:
+                enemy.moved = False
+            for player in self.beings.player_beings:
+                player.moved = False
+                player.attacked = False
+            self._close_turn_context()
+            self.state = State.PLAY
+
+    def _step_enemy_attack(self):
+        # Search for the enemy that did not attack this turn yet, and make him active.
+        if not self.active_enemy:
+            for enemy in self.beings.enemy_beings:
+                if not enemy.attacked:
+                    self.active_enemy = enemy
+        # If there is a valid enemy, then perform the attack planned during the enemy movement.
+        if self.active_enemy:
+            context = self._open_turn_context()
+            # Gather map info if enemy did not do this yes (ie, if it's his first move this turn).
+            if (
+                not self.active_enemy.ai.map_in_range
+                and not self.active_enemy.ai.map_out_range
+            ):
+                self.active_enemy.ai.gather_map_info(self.grid, self.beings, context)
+            # TODO: That's a bit redudant, decide method should not be called every step.
+            decision = self.active_enemy.ai.decide(self.beings, self.grid)
+            target_pos = decision.best_targetable
+            if target_pos:
+                # The attack is performed from the current cell, not from decision.tile, so the cells hit may differ
+                # from decision.best_affected.
+                affected = self.active_enemy.attack.perform(
+                    self.beings,
+                    self.grid.map_objects,
+                    target_pos[0],
+                    target_pos[1],
+                    cursor=False,
+                )
+                if affected:
+                    # Hp of Beings on the affected cells might have changed.
+                    context.update_cells(affected)
+                else:
+                    # The target is out of reach from the current cell, so the enemy gives up its attack this turn.
+                    self.active_enemy.attacked = True
+                self.active_enemy = None
+        # If no valid candidate for active_enemy found, end the enemy attack and let enemies move.
+        else:
+            for enemy in self.beings.enemy_beings:
+                enemy.attacked = False
+            self._close_turn_context()
+            self.state = State.ENEMY_TURN
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+
+import random
+
+from game.ai import Decision
+from game.being import construct_beings, Enemy, Player
+from game.beings import Beings
+from game.grid import Grid
+from game.influence_map import InfluenceMap
+from game.map_objects import MapObjects
+from game.simulation import Simulation
+from game.states import State
+
+
+def test_headless_turns():
+    random.seed("TEST-SEED")
+    simulation = Simulation(Grid(), Beings())
+    simulation.step()
+    assert simulation.state == State.PRESS_ANY_KEY
+    assert len(simulation.beings.enemy_beings) > 0
+    for turn in range(3):
+        simulation.run_enemy_turn()
+        assert simulation.state == State.PLAY
+        assert all(not enemy.moved for enemy in simulation.beings.enemy_beings)
+
+
+def test_headless_turns_on_non_square_grid():
+    random.seed("TEST-SEED")
+    simulation = Simulation(Grid(width=16, height=10), Beings())
+    simulation.step()
+    assert simulation.state == State.PRESS_ANY_KEY
+    assert len(simulation.grid.map_objects.objects) < 16 * 10
+    simulation.run_enemy_turn()
+    assert simulation.state == State.PLAY
+
+
+def test_headless_turns_with_planning_workers():
+    random.seed("TEST-SEED")
+    simulation = Simulation(Grid(), Beings(), planning_workers=2)
+    simulation.step()
+    try:
+        for turn in range(2):
+            simulation.run_enemy_turn()
+            assert simulation.state == State.PLAY
+            cells = [
+                (enemy.cell_position.x, enemy.cell_position.y)
+                for enemy in simulation.beings.enemy_beings
+            ]
+            assert len(set(cells)) == len(cells)
+        # The same worker processes are used for every enemy phase.
+        executor = simulation._planning_executor
+        assert executor is not None
+        simulation.run_enemy_turn()
+        assert simulation._planning_executor is executor
+    finally:
+        simulation.close()
+    assert simulation._planning_executor is None
+
+
+def test_enemy_attack_from_cell_other_than_decision_tile():
+    # The enemy at (3, 3) plans to hit (4, 3) from (4, 4), but attacks before moving there: from (3, 3) the target
+    # is hit by another effect, so the player at (4, 2) is hit instead of the cells of decision.best_affected.
+    grid = Grid(width=8, height=8, map_objects=MapObjects())
+    player = construct_beings(Player, 4, 2)
+    # With 1 hp left the player is worth more to the AI, so the score of its cell changes after the hit.
+    player.hp = 2
+    enemy = construct_beings(Enemy, 3, 3)
+    beings = Beings([player], [enemy])
+    footprint = enemy.attack.footprint_at(4, 4, grid.width, grid.height)
+    best_index = [target for _, target, _ in footprint].index((4, 3))
+    priorities = [0] * len(footprint)
+    decision = Decision((4, 4), [(4, 4)], True, footprint, priorities, [], best_index)
+    assert (4, 2) not in decision.best_affected
+    enemy.ai.decide = lambda beings_, grid_: decision
+    simulation = Simulation(grid, beings, state=State.ENEMY_ATTACK)
+    simulation.step()
+    assert player.hp == 1
+    assert enemy.attacked
+    fresh = InfluenceMap(grid, beings)
+    assert simulation.turn_context.influence.scores == fresh.scores
+    assert simulation.turn_context.influence.targets == fresh.targets
+    simulation.close()
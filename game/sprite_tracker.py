@@ -10,7 +10,6 @@ import math
 
 import arcade
 
-from . import globals
 from .being import Player, Enemy
 from .components.position import Position
 from .components.sprite import Sprite
@@ -23,7 +22,7 @@ from .tile import Tile
 class SpriteTracker:
     """
     SpriteTracker tracks all sprites that should be highlighted: active player, path from player to cursor,
-    targets, etc. Before every use of SpriteTracker, 'player' and 'mouse_position' should be updated.
+    targets, etc. Before every use of SpriteTracker, 'player', 'mouse_position' and 'state' should be updated.
     sprite_active is currently selected player, sprite_selected (should be renamed maybe?) are sprites that player
     can click on (like when choosing a tile to attack from 4 available), sprite_targeted are sprites that will be
     affected by attack (shown only when cursor is over sprite_selected).
@@ -35,7 +34,8 @@ class SpriteTracker:
     _grid: Grid
         Takes instance of Grid; used to highlight targeted MapObject and Tile instances.
     _pathfinder: Pathfinder
-        New instance of monostate-like Pathfinder class; used to hightlight path from active player to cursor.
+        Used to hightlight path from active player to cursor. Game passes its own Pathfinder, so both share last_path;
+        if not passed, new instance is created.
     _tiles_sprites_in_range: arcade.SpriteList()
     _tiles_sprites_selected: arcade.SpriteList()
     _map_objects_sprites_selected: arcade.SpriteList()
@@ -50,12 +50,14 @@ class SpriteTracker:
     player: Being
         Currently active player; this value is used to determine a wide range of behaviours, from showing path to
         showing sprite_targeted.
+    state: State
+        Current game state, decides what should be highlighted. It should be updated before every SpriteTracker usage.
 
     Methods:
     --------
     _add_to_sprite_list (Tile | MapObject | Player | Enemy, bool=False)
-        Takes entity as first argument and bool for a second argument. Based on the entity type, the game adds sprites
-        to the correct arcarde.SpriteList. Boolean value is used to decide if sprite_selected (default)
+        Takes entity as first argument and bool for a second argument. Based on the entity type, the game marks sprites
+        as wanted in the correct arcarde.SpriteList. Boolean value is used to decide if sprite_selected (default)
         or sprite_targeted should be used.
     _find (string)
         Generic-as-possible method to find all sprite_selected and sprite_targeted to show. String passed as argument
@@ -66,27 +68,49 @@ class SpriteTracker:
     _find_map_objects
     _find_tiles
         All these methods at the beginning handle additional cases that depend on the entity type, then call _find.
-    _reset_sprite_lists
-        Clears _tiles_sprites_selected, _map_objects_sprites_selected, and _beings_sprites_selected.
+    _update_range_overlay
+        Recalculates tiles in range of the active player, if the player or Beings / MapObjects version changed.
+    _update_cursor_path
+        Rebuilds path from the active player to the cursor, if the cursor moved to another cell.
+    invalidate
+        Drops cached range overlay and path to cursor.
+    _want (arcade.SpriteList, arcade.Sprite)
+        Marks sprite as wanted in the SpriteList during the current track call.
+    _reset_wanted
+        Forgets sprites wanted during the previous track call.
+    _apply_wanted
+        Removes unwanted sprites from, and adds missing wanted sprites to every SpriteList.
     track
-        One of two public methods of SpriteTracker. 'track' clears all SpriteLists then fills them again by calling
-        _find_... methods.
+        One of public methods of SpriteTracker. 'track' collects wanted sprites by calling _find_... methods,
+        then applies only the differences to the SpriteLists.
     draw
         Draws every Sprites that should be highlighted.
     """
 
-    def __init__(self, beings, grid):
+    def __init__(self, beings, grid, pathfinder=None):
         self._beings = beings
         self._grid = grid
-        self._pathfinder = Pathfinder(grid)
+        self._pathfinder = pathfinder
+        if self._pathfinder is None:
+            self._pathfinder = Pathfinder(grid)
         self._tiles_sprites_in_range = arcade.SpriteList()
         self._tiles_sprites_selected = arcade.SpriteList()
         self._tiles_sprites_overlayed = arcade.SpriteList()
         self._map_objects_sprites_selected = arcade.SpriteList()
         self._beings_sprites_selected = arcade.SpriteList()
         self._attack_overlay = arcade.SpriteList()
+        # Sprites that should be in the SpriteLists above, collected during track; see _apply_wanted.
+        self._wanted = {}
         self.mouse_position = None
         self.player = None
+        self.state = None
+        # Cache of the movement range overlay; see _update_range_overlay.
+        self._range_key = None
+        self._range_predecessors = {}
+        self._range_sprites = []
+        self._cursor_cell = None
+        self._cursor_path = []
+        self._cursor_sprites = []
 
     def _add_to_sprite_list(self, entity, targeted=False, overlay=False):
         """
@@ -97,11 +121,11 @@ class SpriteTracker:
         if targeted:
             sprite = entity.sprite_targeted.arcade_sprite
         if isinstance(entity, Player) or isinstance(entity, Enemy):
-            self._beings_sprites_selected.append(sprite)
+            self._want(self._beings_sprites_selected, sprite)
         elif isinstance(entity, MapObject):
-            self._map_objects_sprites_selected.append(sprite)
+            self._want(self._map_objects_sprites_selected, sprite)
         elif isinstance(entity, Tile):
-            self._tiles_sprites_selected.append(sprite)
+            self._want(self._tiles_sprites_selected, sprite)
         if overlay:
             sprite = Sprite(
                 "target.png",
@@ -127,120 +151,158 @@ class SpriteTracker:
             l = self._grid.map_objects.objects
         elif what == "tiles":
             l = self._grid.tiles
-        for effect in self.player.attack.effects:
-            for coords in effect.target_positions:
-                try:
-                    pos = Position(
-                        self.player.cell_position.x + coords[0],
-                        self.player.cell_position.y + coords[1],
-                    )
-                    for entity in l:
-                        # Find "yellow" entity - ie tile that player can click on.
-                        if (
-                            entity.cell_position.x == pos.x
-                            and entity.cell_position.y == pos.y
-                        ):
-                            self._add_to_sprite_list(entity)
-                        # Find "red" entity - ie tile that will be attacked when player clicks on yellow tile.
-                        if (
-                            pos.x == self.mouse_position.x
-                            and pos.y == self.mouse_position.y
-                        ):
-                            for coords2 in effect.attack_pattern:
-                                pos2 = Position(
-                                    pos.x + coords2[0],
-                                    pos.y + coords2[1],
-                                )
-                                if (
-                                    entity.cell_position.x == pos2.x
-                                    and entity.cell_position.y == pos2.y
-                                ):
-                                    self._add_to_sprite_list(entity, True)
-                except AttributeError:
-                    pass  # No valid player_being found.
-                except ValueError as e:
-                    print(f"{e} in sprite_tracker._find({what})")
+        try:
+            footprint = self.player.attack.footprint_at(
+                self.player.cell_position.x,
+                self.player.cell_position.y,
+                self._grid.width,
+                self._grid.height,
+            )
+        except AttributeError:
+            return  # No valid player_being found.
+        mouse = (self.mouse_position.x, self.mouse_position.y)
+        for _, target, affected in footprint:
+            for entity in l:
+                cell = (entity.cell_position.x, entity.cell_position.y)
+                # Find "yellow" entity - ie tile that player can click on.
+                if cell == target:
+                    self._add_to_sprite_list(entity)
+                # Find "red" entity - ie tile that will be attacked when player clicks on yellow tile.
+                if target == mouse and cell in affected:
+                    self._add_to_sprite_list(entity, True)
 
     def _find_player_beings(self):
         for player in self._beings.player_beings:
             if player.active:
-                self._beings_sprites_selected.append(player.sprite_active.arcade_sprite)
-        if globals.state == State.TARGET and not self.player.attacked:
+                self._want(
+                    self._beings_sprites_selected, player.sprite_active.arcade_sprite
+                )
+        if self.state == State.TARGET and not self.player.attacked:
             self._find("player_beings")
 
     def _find_enemy_beings(self):
-        if globals.state == State.TARGET and not self.player.attacked:
+        if self.state == State.TARGET and not self.player.attacked:
             self._find("enemy_beings")
 
     def _find_map_objects(self):
-        if globals.state == State.TARGET and not self.player.attacked:
+        if self.state == State.TARGET and not self.player.attacked:
             self._find("map_objects")
 
     def _find_tiles(self):
         # Find all tiles that are overlayed.
         for tile in self._grid.tiles:
             if tile.overlayed_by:
-                try:
-                    self._tiles_sprites_overlayed.append(
-                        tile.sprite_overlayed.arcade_sprite
-                    )
-                except ValueError as e:  # Sprite already in SpriteList. Ignore.
-                    pass
-        if globals.state == State.MOVE and not self.player.moved:
-            # Draw all tiles that are in player range.
-            for tile in self._grid.tiles:
-                self._pathfinder.set_up_path_grid(self._beings)
-                self._pathfinder.find_path(
-                    self.player.cell_position,
-                    tile.cell_position,
+                self._want(
+                    self._tiles_sprites_overlayed, tile.sprite_overlayed.arcade_sprite
                 )
-                for i, coords in enumerate(self._pathfinder.last_path):
-                    tile = self._grid.find_tile_by_position(
-                        Position(coords[0], coords[1])
-                    )
-                    try:
-                        if i <= self.player.range:
-                            self._tiles_sprites_in_range.append(
-                                tile.sprite_in_range.arcade_sprite
-                            )
-                    except ValueError as e:  # Sprite already in SpriteList. .clear() not called?
-                        pass
-            try:
-                # Then show path from player to cursor.
-                self._pathfinder.set_up_path_grid(self._beings)
-                self._pathfinder.find_path(
-                    self.player.cell_position,
-                    self.mouse_position,
-                )
-                for i, coords in enumerate(self._pathfinder.last_path):
-                    tile = self._grid.find_tile_by_position(
-                        Position(coords[0], coords[1])
-                    )
-                    # Use green "sprite_path" if tile is in range of active player.
-                    spr = tile.sprite_path
-                    if i > self.player.range:
-                        # Otherwise, use red "sprite_targeted".
-                        spr = tile.sprite_targeted
-                    self._tiles_sprites_selected.append(spr.arcade_sprite)
-            except TypeError:  # Empty last_path
-                pass
-        elif globals.state == State.TARGET and not self.player.attacked:
+        if self.state == State.MOVE and not self.player.moved:
+            # Draw all tiles that are in player range...
+            self._update_range_overlay()
+            for sprite in self._range_sprites:
+                self._want(self._tiles_sprites_in_range, sprite)
+            # ...then show path from player to cursor.
+            self._update_cursor_path()
+            for sprite in self._cursor_sprites:
+                self._want(self._tiles_sprites_selected, sprite)
+            # Game pops steps from last_path while moving the player, so pass a copy.
+            self._pathfinder.last_path = list(self._cursor_path)
+        elif self.state == State.TARGET and not self.player.attacked:
             self._find("tiles")
 
-    def _reset_sprite_lists(self):
-        self._beings_sprites_selected.clear()
-        self._map_objects_sprites_selected.clear()
-        self._tiles_sprites_in_range.clear()
-        self._tiles_sprites_selected.clear()
-        self._tiles_sprites_overlayed.clear()
+    def _update_range_overlay(self):
+        """
+        Recalculates tiles in range of the active player, but only if the player, or occupancy of the map, changed
+        since the last call. Otherwise, cached sprites are kept.
+        """
+        map_objects = self._grid.map_objects
+        key = (
+            self.player,
+            self.player.range,
+            self._beings.version,
+            map_objects,
+            map_objects.version,
+        )
+        if key == self._range_key:
+            return
+        self._pathfinder.set_up_path_grid(self._beings)
+        distances, predecessors = self._pathfinder.distance_field(
+            self.player.cell_position
+        )
+        self._range_sprites = [
+            self._grid.tile_at(coords[0], coords[1]).sprite_in_range.arcade_sprite
+            for coords, distance in distances.items()
+            if distance <= self.player.range
+        ]
+        self._range_predecessors = predecessors
+        self._range_key = key
+        # Path to cursor needs to be rebuilt using the new predecessors.
+        self._cursor_cell = None
+
+    def _update_cursor_path(self):
+        """Rebuilds path from the active player to the cursor, but only if the cursor moved to another cell."""
+        cell = (self.mouse_position.x, self.mouse_position.y)
+        if cell == self._cursor_cell:
+            return
+        self._cursor_path = self._pathfinder.reconstruct_path(
+            self._range_predecessors, cell
+        )
+        self._cursor_sprites = []
+        for i, coords in enumerate(self._cursor_path):
+            tile = self._grid.tile_at(coords[0], coords[1])
+            # Use green "sprite_path" if tile is in range of active player.
+            spr = tile.sprite_path
+            if i > self.player.range:
+                # Otherwise, use red "sprite_targeted".
+                spr = tile.sprite_targeted
+            self._cursor_sprites.append(spr.arcade_sprite)
+        self._cursor_cell = cell
+
+    def invalidate(self):
+        """Drops the cached range overlay and path to cursor, so they are recalculated during the next track call."""
+        self._range_key = None
+        self._cursor_cell = None
+
+    def _want(self, sprite_list, sprite):
+        """
+        Marks sprite as one that should be in the sprite_list after the current track call.
+        Adding the same sprite more than once is allowed.
+        """
+        self._wanted[sprite_list][sprite] = None
+
+    def _reset_wanted(self):
+        """Starts new track call with no sprites wanted in any of the SpriteLists."""
+        self._wanted = {
+            self._beings_sprites_selected: {},
+            self._map_objects_sprites_selected: {},
+            self._tiles_sprites_in_range: {},
+            self._tiles_sprites_selected: {},
+            self._tiles_sprites_overlayed: {},
+        }
+
+    def _apply_wanted(self):
+        """
+        Updates every SpriteList so it contains only the wanted sprites. Sprites that are already in the SpriteList
+        are left untouched, so only changes are uploaded to the GPU.
+        """
+        for sprite_list, wanted in self._wanted.items():
+            current = set(sprite_list)
+            for sprite in current.difference(wanted):
+                sprite_list.remove(sprite)
+            for sprite in wanted:
+                if sprite not in current:
+                    sprite_list.append(sprite)
 
     def track(self):
-        """Clears all arcade.SpriteList instances in SpriteTracker and fills them again with updated data."""
-        self._reset_sprite_lists()
+        """
+        Finds all sprites that should be highlighted, then adds and removes sprites from arcade.SpriteList
+        instances in SpriteTracker, so they match the updated data.
+        """
+        self._reset_wanted()
         self._find_tiles()
         self._find_map_objects()
         self._find_enemy_beings()
         self._find_player_beings()
+        self._apply_wanted()
 
     def draw(self):
         self._tiles_sprites_in_range.draw()
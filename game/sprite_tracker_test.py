@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+
+from game.being import construct_beings, Player
+from game.beings import Beings
+from game.components.position import Position
+from game.grid import Grid
+from game.map_objects import MapObjects
+from game.sprite_tracker import SpriteTracker
+from game.states import State
+
+
+def test_range_overlay_is_cached():
+    grid = Grid(width=8, height=8, map_objects=MapObjects())
+    player = construct_beings(Player, 0, 0)
+    beings = Beings([player])
+    sprite_tracker = SpriteTracker(beings, grid)
+    sprite_tracker.player = player
+    sprite_tracker.mouse_position = Position(2, 0)
+    sprite_tracker.state = State.MOVE
+    sprite_tracker.track()
+    # Tiles within 5 steps from the corner of the empty map.
+    assert len(sprite_tracker._tiles_sprites_in_range) == 21
+    assert sprite_tracker._pathfinder.last_path == [(0, 0), (1, 0), (2, 0)]
+    key = sprite_tracker._range_key
+    sprite_tracker.track()
+    assert sprite_tracker._range_key is key
+    player.move_to(1, 0)
+    sprite_tracker.track()
+    assert sprite_tracker._range_key is not key
+    assert sprite_tracker._pathfinder.last_path == [(1, 0), (2, 0)]
+
+
+def test_sprite_lists_are_updated_incrementally():
+    grid = Grid(width=8, height=8, map_objects=MapObjects())
+    player = construct_beings(Player, 0, 0)
+    beings = Beings([player])
+    sprite_tracker = SpriteTracker(beings, grid)
+    sprite_tracker.player = player
+    sprite_tracker.mouse_position = Position(2, 0)
+    sprite_tracker.state = State.MOVE
+    sprite_tracker.track()
+    in_range = list(sprite_tracker._tiles_sprites_in_range)
+    sprite_tracker.mouse_position = Position(0, 3)
+    sprite_tracker.track()
+    assert list(sprite_tracker._tiles_sprites_in_range) == in_range
+    assert len(sprite_tracker._tiles_sprites_selected) == 4
+    sprite_tracker.state = State.PLAY
+    sprite_tracker.track()
+    assert len(sprite_tracker._tiles_sprites_in_range) == 0
+    assert len(sprite_tracker._tiles_sprites_selected) == 0
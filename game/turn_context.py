@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+
+from .influence_map import InfluenceMap
+from .pathfinding import Pathfinder
+
+
+class TurnContext:
+    """
+    TurnContext is a snapshot of the world shared by all enemy AIs during one enemy phase (ENEMY_ATTACK or
+    ENEMY_TURN). It is built once, when the phase starts, instead of every AI building its own walkable flags and
+    InfluenceMap. The snapshot subscribes to Beings and MapObjects (see their listeners attribute), so it is patched
+    cell by cell when an enemy moves, or Being or MapObject is removed; attack results are applied by update_cells.
+
+    Parameters:
+    -----------
+    grid: Grid
+        Current map, with its MapObjects.
+    beings: Beings
+        All player and enemy Beings.
+
+    Attributes:
+    -----------
+    pathfinder: Pathfinder
+        Pathfinder using the Grid occupancy with cells occupied by Beings blocked. Its walkable flags are kept up to
+        date by Occupancy, and its results are cached in the Grid path cache until the occupancy changes.
+    influence: InfluenceMap
+        Scores and targets of every cell, see InfluenceMap.
+
+    Methods:
+    --------
+    distance_field (Being): dict, dict
+        Returns distances and predecessors of the cells reachable by the Being, see Pathfinder.distance_field.
+    update_cells (iterable of tuples)
+        Recalculates the InfluenceMap cells, e.g. after the attack changed hp of Beings standing on them.
+    close
+        Unsubscribes from Beings and MapObjects. Called when the enemy phase ends.
+    map_object_added, map_object_removed (MapObject)
+    being_added, being_removed (Being)
+    being_moved (Being, Position)
+        Called by MapObjects and Beings to patch the snapshot.
+    """
+
+    def __init__(self, grid, beings):
+        self.grid = grid
+        self.beings = beings
+        self.map_objects = grid.map_objects
+        self.pathfinder = Pathfinder(grid, grid.workspace_pool, grid.path_cache)
+        self.pathfinder.set_up_path_grid(beings)
+        self.influence = InfluenceMap(grid, beings)
+        self.map_objects.listeners.append(self)
+        self.beings.listeners.append(self)
+
+    def distance_field(self, being):
+        return self.pathfinder.distance_field(being.cell_position)
+
+    def update_cells(self, cells):
+        for x, y in cells:
+            self.influence.update_cell(x, y)
+
+    def close(self):
+        if self in self.map_objects.listeners:
+            self.map_objects.listeners.remove(self)
+        if self in self.beings.listeners:
+            self.beings.listeners.remove(self)
+
+    def map_object_added(self, map_object):
+        self.influence.update_cell(
+            map_object.cell_position.x, map_object.cell_position.y
+        )
+
+    def map_object_removed(self, map_object):
+        self.influence.update_cell(
+            map_object.cell_position.x, map_object.cell_position.y
+        )
+
+    def being_added(self, being):
+        self.influence.update_cell(being.cell_position.x, being.cell_position.y)
+
+    def being_removed(self, being):
+        self.influence.update_cell(being.cell_position.x, being.cell_position.y)
+
+    def being_moved(self, being, old_position):
+        self.influence.update_cell(old_position.x, old_position.y)
+        self.influence.update_cell(being.cell_position.x, being.cell_position.y)
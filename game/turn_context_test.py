@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+
+from .being import construct_beings, Enemy, Player
+from .beings import Beings
+from .grid import Grid
+from .influence_map import InfluenceMap
+from .map_object import MapObject
+from .map_objects import MapObjects
+from .turn_context import TurnContext
+
+
+def test_turn_context_is_updated_incrementally():
+    map_objects = MapObjects()
+    building = MapObject(
+        3, 0, "test.png", "test_selected.png", "test_targeted.png", target=True
+    )
+    map_objects.add_map_object(building)
+    grid = Grid(width=8, height=8, map_objects=map_objects)
+    player = construct_beings(Player, 1, 1)
+    enemy = construct_beings(Enemy, 3, 1)
+    beings = Beings([player], [enemy])
+    context = TurnContext(grid, beings)
+    distances, _ = context.distance_field(enemy)
+    assert distances[(3, 2)] == 1
+    enemy.move_to(3, 3)
+    player.hp = 1
+    context.update_cells([(1, 1)])
+    map_objects.remove_map_object(building)
+    fresh = InfluenceMap(grid, beings)
+    assert context.influence.scores == fresh.scores
+    assert context.influence.targets == fresh.targets
+    distances, _ = context.distance_field(enemy)
+    assert distances[(3, 2)] == 1 and distances[(3, 1)] == 2
+    context.close()
+    assert context not in beings.listeners
+    assert context not in map_objects.listeners
@@ -9,8 +9,9 @@ from game import constants
 from game.beings import Beings
 from game.game import Game
 from game.grid import Grid
+from game.map_cache import MapCache
 from game.seeding import make_seed
-
+from game.simulation import Simulation
 
 game_seed = make_seed(4, 4)
 random.seed(game_seed)
@@ -20,16 +21,18 @@ grid = Grid()
 
 beings = Beings()
 
+map_cache = MapCache()
+
+simulation = Simulation(grid, beings, seed=game_seed, map_cache=map_cache)
+
 g = Game(
     constants.SCREEN_WIDTH,
     constants.SCREEN_HEIGHT,
     constants.SCREEN_TITLE,
-    grid,
-    beings,
+    simulation,
 )
 
-g.beings.owner = g
-
 
 if __name__ == "__main__":
     arcade.run()
+    simulation.close()